@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import path, re_path
+
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_READ_WORKERS,
+                    thread_name_prefix='async-read'
+                )
+    return executor
+
+
+def run_in_worker(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+def async_view(viewset, actions, **initkwargs):
+    view = viewset.as_view(actions, **initkwargs)
+    read = sync_to_async(
+        run_in_worker(view),
+        thread_sensitive=False,
+        executor=get_executor()
+    )
+    write = sync_to_async(view)
+
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+tag_list = async_view(
+    TagViewSet, {'get': 'list'}, basename='tags', detail=False
+)
+tag_detail = async_view(
+    TagViewSet, {'get': 'retrieve'}, basename='tags', detail=True
+)
+ingredient_list = async_view(
+    IngredientViewSet, {'get': 'list'}, basename='ingredients', detail=False
+)
+ingredient_detail = async_view(
+    IngredientViewSet, {'get': 'retrieve'},
+    basename='ingredients', detail=True
+)
+recipe_list = async_view(
+    RecipeViewSet, {'get': 'list', 'post': 'create'},
+    basename='recipes', detail=False
+)
+recipe_detail = async_view(
+    RecipeViewSet,
+    {'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'},
+    basename='recipes', detail=True
+)
+subscriptions = async_view(
+    UserViewSet, {'get': 'subscriptions'},
+    basename='users', detail=False, **UserViewSet.subscriptions.kwargs
+)
+
+
+urlpatterns = [
+    path('tags/', tag_list, name='tags-list'),
+    re_path(r'^tags/(?P<pk>\d+)/$', tag_detail, name='tags-detail'),
+    path('ingredients/', ingredient_list, name='ingredients-list'),
+    re_path(
+        r'^ingredients/(?P<pk>\d+)/$',
+        ingredient_detail,
+        name='ingredients-detail'
+    ),
+    path('recipes/', recipe_list, name='recipes-list'),
+    re_path(
+        r'^recipes/(?P<pk>\d+)/$',
+        recipe_detail,
+        name='recipes-detail'
+    ),
+    path(
+        'users/subscriptions/',
+        subscriptions,
+        name='users-subscriptions'
+    ),
+]
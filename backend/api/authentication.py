@@ -0,0 +1,151 @@
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+STAMP_KEY = 'auth:{}'
+SNAPSHOT_EXCLUDE = ('password', 'recipes_count', 'followers_count')
+
+
+class TokenCache:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            self.entries[key] = (
+                time.monotonic() + (timeout or self.timeout), value
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+local_cache = TokenCache(
+    settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    settings.AUTH_TOKEN_CACHE_TIMEOUT
+)
+
+
+def get_snapshot_fields():
+    return tuple(
+        field.attname for field in User._meta.concrete_fields
+        if field.attname not in SNAPSHOT_EXCLUDE
+    )
+
+
+def get_stamp_key(key):
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), key.encode(), hashlib.sha256
+    ).hexdigest()
+    return STAMP_KEY.format(digest)
+
+
+def get_shared_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def make_stamp():
+    return uuid.uuid4().hex
+
+
+def get_stamp(stamp_key):
+    cache = get_shared_cache()
+    stamp = cache.get(stamp_key)
+    if stamp is None:
+        cache.add(
+            stamp_key, make_stamp(), timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT
+        )
+        stamp = cache.get(stamp_key)
+    return stamp
+
+
+def revoke_stamps(stamp_keys):
+    get_shared_cache().set_many(
+        {stamp_key: make_stamp() for stamp_key in stamp_keys},
+        timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT
+    )
+
+
+def make_snapshot(user):
+    fields = get_snapshot_fields()
+    return fields, tuple(getattr(user, field) for field in fields)
+
+
+def load_snapshot(snapshot):
+    fields, values = snapshot
+    return User.from_db('default', fields, values)
+
+
+def invalidate_tokens(keys):
+    stamp_keys = [get_stamp_key(key) for key in keys]
+    if stamp_keys:
+        transaction.on_commit(lambda: revoke_stamps(stamp_keys))
+
+
+def invalidate_user_tokens(user_id):
+    invalidate_tokens(
+        Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    local_cache = local_cache
+
+    def get_snapshot(self, key):
+        stamp_key = get_stamp_key(key)
+        stamp = get_stamp(stamp_key)
+        entry = self.local_cache.get(stamp_key)
+        if stamp is not None and entry is not None and entry[0] == stamp:
+            return entry[1]
+        snapshot = self.load_snapshot(key)
+        if stamp is not None and snapshot is not None:
+            self.local_cache.set(stamp_key, (stamp, snapshot))
+        return snapshot
+
+    def load_snapshot(self, key):
+        token = self.get_model().objects.select_related('user').only(
+            'key', *(f'user__{field}' for field in get_snapshot_fields())
+        ).filter(key=key).first()
+        if token is None:
+            return None
+        return token.key, make_snapshot(token.user)
+
+    def authenticate_credentials(self, key):
+        snapshot = self.get_snapshot(key)
+        if snapshot is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        token_key, user_snapshot = snapshot
+        user = load_snapshot(user_snapshot)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user, self.get_model()(key=token_key, user=user)
@@ -0,0 +1,87 @@
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+from recipes.images import get_variant_urls
+
+BASE64_CHUNK_SIZE = 64 * 1024
+
+
+class ImageVariantsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        return {
+            variant: {
+                extension: (
+                    request.build_absolute_uri(url) if request else url
+                )
+                for extension, url in urls.items()
+            }
+            for variant, urls in get_variant_urls(recipe).items()
+        }
+
+
+class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'max_size': (
+            'Размер изображения не должен превышать '
+            f'{settings.IMAGE_MAX_SIZE // (1024 * 1024)} МБ'
+        ),
+        'max_pixels': (
+            'Изображение не должно превышать '
+            f'{settings.IMAGE_MAX_PIXELS // 1000000} Мпикс'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith('data:'):
+            data = self.decode(data)
+        elif isinstance(data, str) and data.startswith('http'):
+            raise SkipField()
+        image = super().to_internal_value(data)
+        width, height = image.image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            self.fail('max_pixels')
+        return image
+
+    def decode(self, data):
+        header, _, encoded = data.partition(';base64,')
+        if len(encoded) // 4 * 3 > settings.IMAGE_MAX_SIZE:
+            self.fail('max_size')
+        content_type = header[len('data:'):]
+        extension = content_type.split('/')[-1]
+        if extension.startswith('svg'):
+            extension = 'svg'
+        upload = TemporaryUploadedFile(
+            f'upload.{extension}', content_type, 0, None
+        )
+        sha256 = hashlib.sha256()
+        rest = ''
+        try:
+            for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+                chunk = rest + ''.join(
+                    encoded[start:start + BASE64_CHUNK_SIZE].split()
+                )
+                end = len(chunk) - len(chunk) % 4
+                decoded = binascii.a2b_base64(chunk[:end])
+                rest = chunk[end:]
+                sha256.update(decoded)
+                upload.write(decoded)
+                upload.size += len(decoded)
+            if rest:
+                raise binascii.Error
+        except (binascii.Error, ValueError):
+            upload.close()
+            self.fail('invalid_image')
+        upload.seek(0)
+        upload.content_hash = sha256.hexdigest()
+        return upload
@@ -1,6 +1,10 @@
+from django.db.models import F
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+
+ORDERING_CHOICES = (('popular', 'popular'), )
 
 
 class RecipeFilter(FilterSet):
@@ -10,23 +14,42 @@ class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart')
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=ORDERING_CHOICES,
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = (
             'author', 'tags',
             'is_favorited',
-            'is_in_shopping_cart'
+            'is_in_shopping_cart',
+            'search',
+            'ordering'
         )
 
     def get_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shopping_carts__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    def get_search(self, queryset, name, value):
+        if value.strip():
+            return search_recipes(queryset, value)
+        return queryset
+
+    def get_ordering(self, queryset, name, value):
+        if value == 'popular':
+            return queryset.order_by(
+                F('popularity__rank').asc(nulls_last=True), '-pub_date', '-id'
+            )
         return queryset
 
 
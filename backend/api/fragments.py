@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+
+from foodgram.versions import get_versions
+from recipes.models import Ingredient, Tag, get_representation_prefetches
+
+FRAGMENT_KEY = 'fragment:{}:{}:{}'
+
+
+def get_fragment_key(name, recipe, state):
+    author = recipe.author
+    key = json.dumps((
+        recipe.modified,
+        recipe.favorites_count,
+        recipe.in_carts_count,
+        author.id,
+        author.email,
+        author.username,
+        author.first_name,
+        author.last_name,
+        author.recipes_count,
+        author.followers_count,
+        state
+    ), default=str)
+    return FRAGMENT_KEY.format(
+        name, recipe.id, hashlib.md5(key.encode()).hexdigest()
+    )
+
+
+def get_fragments(serializer, recipes, request):
+    cache = caches[settings.FRAGMENT_CACHE_ALIAS]
+    name = type(serializer).__name__
+    state = (request.build_absolute_uri('/'), get_versions(Tag, Ingredient))
+    keys = {
+        recipe.id: get_fragment_key(name, recipe, state)
+        for recipe in recipes
+    }
+    fragments = cache.get_many(list(keys.values()))
+    missing = {
+        recipe.id: recipe for recipe in recipes
+        if keys[recipe.id] not in fragments
+    }
+    if missing:
+        prefetch_related_objects(
+            list(missing.values()), *get_representation_prefetches()
+        )
+        created = {
+            keys[recipe_id]: serializer.to_shared_representation(recipe)
+            for recipe_id, recipe in missing.items()
+        }
+        cache.set_many(created, settings.FRAGMENT_CACHE_TIMEOUT)
+        fragments.update(created)
+    return {
+        recipe_id: fragments[key] for recipe_id, key in keys.items()
+    }
@@ -0,0 +1,47 @@
+from recipes.models import Cart, Favorite
+from users.models import Subscribe
+
+RELATION_FIELDS = {
+    Subscribe: 'author_id',
+    Favorite: 'recipe_id',
+    Cart: 'recipe_id',
+}
+
+
+class ViewerRelations:
+    def __init__(self, user):
+        self.user = user
+        self.loaded = {model: set() for model in RELATION_FIELDS}
+        self.members = {model: set() for model in RELATION_FIELDS}
+
+    def prime(self, model, ids):
+        missing = set(ids) - self.loaded[model]
+        if not missing:
+            return
+        if self.user.is_authenticated:
+            field = RELATION_FIELDS[model]
+            self.members[model].update(model.objects.filter(
+                user=self.user,
+                **{f'{field}__in': missing}
+            ).values_list(field, flat=True))
+        self.loaded[model] |= missing
+
+    def contains(self, model, obj_id):
+        self.prime(model, (obj_id, ))
+        return obj_id in self.members[model]
+
+    def add(self, model, obj_id):
+        self.loaded[model].add(obj_id)
+        self.members[model].add(obj_id)
+
+    def discard(self, model, obj_id):
+        self.loaded[model].add(obj_id)
+        self.members[model].discard(obj_id)
+
+
+def get_viewer_relations(request):
+    relations = getattr(request, 'viewer_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = ViewerRelations(request.user)
+        request.viewer_relations = relations
+    return relations
@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from foodgram.versions import get_versions
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    etag_models = ()
+
+    def get_version_etag(self, request):
+        return make_etag(
+            request.get_full_path(),
+            get_versions(*self.etag_models)
+        )
+
+    def conditional_response(self, request, render, etag,
+                             last_modified=None, vary=()):
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = render()
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if vary:
+            patch_vary_headers(response, vary)
+        return response
+
+
+class VersionETagMixin(ConditionalGetMixin):
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(VersionETagMixin, self).list(
+                request, *args, **kwargs
+            ),
+            self.get_version_etag(request)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(VersionETagMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+            self.get_version_etag(request)
+        )
@@ -1,7 +1,247 @@
+import base64
+import binascii
+import hashlib
+import json
+from functools import partial
+
 from django.conf import settings
-from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from foodgram.versions import get_versions
+
+COUNT_CACHE_KEY = 'count:{}'
+
+
+class KeysetLimitPaginator(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = settings.PAGE_SIZE
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Некорректный курсор'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def get_fields(self, model):
+        fields = []
+        for name in self.ordering:
+            lookup = name.lstrip('-')
+            *path, field_name = lookup.split('__')
+            related = model
+            for part in path:
+                related = related._meta.get_field(part).related_model
+            fields.append((
+                path,
+                related._meta.get_field(field_name),
+                name.startswith('-')
+            ))
+        return fields
+
+    def decode_cursor(self, request, fields):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for (_, field, _), value in zip(fields, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, fields):
+        values = []
+        for path, field, _ in fields:
+            related = obj
+            for part in path:
+                related = getattr(related, part)
+            values.append(field.value_to_string(related))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def get_position_filter(self, fields, position):
+        position_filter = Q()
+        equal = {}
+        for (path, field, descending), value in zip(fields, position):
+            lookup = 'lt' if descending else 'gt'
+            name = '__'.join((*path, field.attname))
+            position_filter |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return position_filter
+
+    def paginate(self, request, view, model, load):
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.fields = self.get_fields(model)
+        page_size = self.get_page_size(request)
+        page = load(self.decode_cursor(request, self.fields), page_size + 1)
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1], self.fields)
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        def load(position, limit):
+            ordered = queryset.order_by(*self.ordering)
+            if position is not None:
+                ordered = ordered.filter(
+                    self.get_position_filter(self.fields, position)
+                )
+            return list(ordered[:limit])
+
+        return self.paginate(request, view, queryset.model, load)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            (queryset.model._meta.db_table, )
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    def __init__(self, *args, count_key=None, approximate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.approximate = approximate
+
+    @cached_property
+    def count(self):
+        if self.approximate:
+            count = estimate_count(self.object_list)
+            if count is not None:
+                return count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = Paginator.count.func(self)
+            cache.set(
+                self.count_key,
+                count,
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+        return count
+
+
+class RankRangePaginator(CachedCountPaginator):
+    def __init__(self, *args, rank_field=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rank_field = rank_field
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list.filter(**{
+            f'{self.rank_field}__gt': bottom,
+            f'{self.rank_field}__lte': bottom + self.per_page
+        }), number, self)
 
 
 class PageNumberLimitPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = settings.PAGE_SIZE
+    keyset_paginator_class = KeysetLimitPaginator
+    non_filter_params = (
+        'page', 'limit', 'cursor', 'pagination', 'recipes_limit'
+    )
+
+    def get_count_filters(self, request):
+        return sorted(
+            (param, sorted(values))
+            for param, values in request.query_params.lists()
+            if param not in self.non_filter_params
+        )
+
+    def get_count_cache_key(self, request, view, filters):
+        models = list(view.count_cache_models)
+        viewer_filters = getattr(view, 'viewer_count_filters', {})
+        viewer = None
+        for param, _ in filters:
+            if param in viewer_filters:
+                models.append(viewer_filters[param])
+                viewer = request.user.id
+        key = json.dumps(
+            (request.path, filters, viewer, get_versions(*models)),
+            default=str
+        )
+        return COUNT_CACHE_KEY.format(hashlib.md5(key.encode()).hexdigest())
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        self.django_paginator_class = Paginator
+        if not isinstance(queryset, QuerySet):
+            return super().paginate_queryset(queryset, request, view)
+        if self.keyset_paginator_class.is_requested(request):
+            self.keyset_paginator = self.keyset_paginator_class()
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        if getattr(view, 'count_cache_models', None):
+            filters = self.get_count_filters(request)
+            count_key = self.get_count_cache_key(request, view, filters)
+            rank_field = getattr(view, 'rank_field', None)
+            if rank_field and not filters:
+                self.django_paginator_class = partial(
+                    RankRangePaginator,
+                    count_key=count_key,
+                    rank_field=rank_field
+                )
+            else:
+                self.django_paginator_class = partial(
+                    CachedCountPaginator,
+                    count_key=count_key,
+                    approximate=(
+                        settings.PAGINATION_APPROXIMATE_COUNT and not filters
+                    )
+                )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,184 @@
+import csv
+import json
+from abc import ABCMeta, abstractmethod
+
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 8192
+PDF_LINES_PER_PAGE = 50
+PDF_CYRILLIC = 'АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+
+
+def chunked(parts, size=CHUNK_SIZE):
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListRenderer(BaseRenderer, metaclass=ABCMeta):
+    charset = 'utf-8'
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode()
+
+    def stream(self, items):
+        return chunked(self.encode(items))
+
+    @abstractmethod
+    def encode(self, items):
+        pass
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def encode(self, items):
+        for name, measurement_unit, amount in items:
+            yield f'{name} - {amount} {measurement_unit}\n'.encode()
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('Ингредиент', 'Количество', 'Единица измерения')
+
+    def encode(self, items):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header).encode()
+        for name, measurement_unit, amount in items:
+            yield writer.writerow((name, amount, measurement_unit)).encode()
+
+
+class ShoppingListJSONRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def encode(self, items):
+        separator = b'['
+        for name, measurement_unit, amount in items:
+            yield separator + json.dumps({
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount
+            }, ensure_ascii=False).encode()
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    title = 'Список покупок'
+
+    def get_font_differences(self):
+        names = {'Ё': 10023, 'ё': 10071}
+        for index, letter in enumerate(PDF_CYRILLIC):
+            shift = index + (index >= 6)
+            names[letter] = 10017 + shift
+            names[letter.lower()] = 10065 + shift
+        return ' '.join(
+            f'{letter.encode("cp1251")[0]} /afii{code}'
+            for letter, code in sorted(
+                names.items(), key=lambda item: item[0].encode('cp1251')
+            )
+        )
+
+    def escape(self, text):
+        text = text.encode('cp1251', errors='replace')
+        for char in (b'\\', b'(', b')'):
+            text = text.replace(char, b'\\' + char)
+        return text
+
+    def page_content(self, lines):
+        content = [b'BT /F1 11 Tf 15 TL 50 800 Td']
+        content += [b'(' + self.escape(line) + b') Tj T*' for line in lines]
+        content.append(b'ET')
+        return b'\n'.join(content)
+
+    def lines(self, items):
+        yield self.title
+        yield ''
+        for name, measurement_unit, amount in items:
+            yield f'{name} - {amount} {measurement_unit}'
+
+    def pages(self, items):
+        page = []
+        for line in self.lines(items):
+            page.append(line)
+            if len(page) == PDF_LINES_PER_PAGE:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def encode(self, items):
+        offsets = {}
+        position = 0
+
+        def write_object(number, body):
+            nonlocal position
+            offsets[number] = position
+            data = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+            position += len(data)
+            return data
+
+        header = b'%PDF-1.4\n'
+        position = len(header)
+        yield header
+        yield write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        yield write_object(3, (
+            '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+            '/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+            f'/Differences [{self.get_font_differences()}] >> >>'
+        ).encode())
+        kids = []
+        number = 3
+        for lines in self.pages(items):
+            content = self.page_content(lines)
+            yield write_object(
+                number + 1,
+                b'<< /Length %d >>\nstream\n%s\nendstream' % (
+                    len(content), content
+                )
+            )
+            yield write_object(number + 2, (
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                b'/Resources << /Font << /F1 3 0 R >> >> '
+                b'/Contents %d 0 R >>' % (number + 1)
+            ))
+            kids.append(b'%d 0 R' % (number + 2))
+            number += 2
+        yield write_object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(kids), len(kids)
+        ))
+        yield b'xref\n0 %d\n0000000000 65535 f \n' % (number + 1)
+        yield b''.join(
+            b'%010d 00000 n \n' % offsets[index]
+            for index in range(1, number + 1)
+        )
+        yield (
+            b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (number + 1, position)
+        )
@@ -1,15 +1,62 @@
 from django.conf import settings
+from django.db import models
+from django.db.models import prefetch_related_objects
 from django.db.transaction import atomic
 from djoser.serializers import UserCreateSerializer
-from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.fields import Base64ImageField, ImageVariantsField
+from api.fragments import get_fragments
+from api.loaders import get_viewer_relations
+from recipes import shopping_list
+from recipes.images import schedule_recipe_image
+from recipes.pantry_index import record_changes
 from recipes.models import (Cart, Favorite, Ingredient, Recipe,
-                            RecipeIngredient, Tag)
+                            RecipeIngredient, ShoppingListItem, Tag,
+                            get_representation_prefetches)
+from recipes.storage import is_stored
 from users.models import Subscribe, User
 
 
-class UserSerializer(UserCreateSerializer):
+class ViewerRelationsListSerializer(serializers.ListSerializer):
+    def prime(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        data = list(data)
+        request = self.context.get('request')
+        if request is not None:
+            self.child.prime_viewer_relations(
+                get_viewer_relations(request), data
+            )
+        return data
+
+    def to_representation(self, data):
+        return super().to_representation(self.prime(data))
+
+
+class RecipeFragmentListSerializer(ViewerRelationsListSerializer):
+    def to_representation(self, data):
+        data = self.prime(data)
+        request = self.context.get('request')
+        if request is None:
+            return [self.child.to_representation(item) for item in data]
+        fragments = get_fragments(self.child, data, request)
+        return [
+            self.child.overlay_viewer_fields(fragments[item.id], item)
+            for item in data
+        ]
+
+
+class ViewerRelationsMixin:
+    def viewer_has(self, model, obj_id):
+        request = self.context.get('request')
+        return (
+            request is not None
+            and get_viewer_relations(request).contains(model, obj_id)
+        )
+
+
+class UserSerializer(ViewerRelationsMixin, UserCreateSerializer):
     is_subscribed = serializers.SerializerMethodField(
         method_name='get_is_subscribed'
     )
@@ -22,22 +69,26 @@ class UserSerializer(UserCreateSerializer):
             'username',
             'first_name',
             'last_name',
-            'is_subscribed'
+            'is_subscribed',
+            'recipes_count',
+            'followers_count'
         )
+        read_only_fields = ('recipes_count', 'followers_count')
+        list_serializer_class = ViewerRelationsListSerializer
+
+    def prime_viewer_relations(self, relations, users):
+        relations.prime(Subscribe, (
+            user.id for user in users if not hasattr(user, 'is_subscribed')
+        ))
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Subscribe.objects.filter(
-                user=request.user,
-                author=obj
-            ).exists()
-        )
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return self.viewer_has(Subscribe, obj.id)
 
 
 class RecipeSimpleSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -45,54 +96,39 @@ class RecipeSimpleSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
-    is_subscribed = serializers.SerializerMethodField(
-        method_name='get_is_subscribed'
+class RecipesLimitSerializer(serializers.Serializer):
+    recipes_limit = serializers.IntegerField(min_value=0, required=False)
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_MAX
     )
+
+
+class SubscriptionsSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField(
         method_name='get_recipes'
     )
-    recipes_count = serializers.SerializerMethodField(
-        method_name='get_recipes_count'
-    )
-
-    class Meta:
-        model = User
-        fields = (
-            'id',
-            'email',
-            'username',
-            'first_name',
-            'last_name',
-            'is_subscribed',
-            'recipes',
-            'recipes_count'
-        )
-
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Subscribe.objects.filter(
-                user=request.user,
-                author=obj
-            ).exists()
-        )
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('recipes', )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            recipes = obj.recipes.all()
+            limit = self.context.get('recipes_limit')
+            if limit is not None:
+                recipes = recipes[:limit]
         serializer = RecipeSimpleSerializer(
             recipes, many=True, read_only=True)
         return serializer.data
@@ -111,6 +147,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
         return author
 
     def to_representation(self, instance):
+        instance.author.is_subscribed = True
         return SubscriptionsSerializer(
             instance.author,
             context=self.context
@@ -174,6 +211,21 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = (
+            'name',
+            'measurement_unit',
+            'amount'
+        )
+
+
 class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -181,7 +233,8 @@ class TagSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(ViewerRelationsMixin,
+                           serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientInRecipeSerializer(
@@ -195,32 +248,65 @@ class RecipeListSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image_variants = ImageVariantsField()
+    viewer_fields = ('is_favorited', 'is_in_shopping_cart')
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date', )
+        exclude = ('pub_date', 'modified', 'search_vector')
+        list_serializer_class = RecipeFragmentListSerializer
+
+    def prime_viewer_relations(self, relations, recipes):
+        recipes = [
+            recipe for recipe in recipes
+            if not hasattr(recipe, 'is_favorited')
+        ]
+        relations.prime(Favorite, (recipe.id for recipe in recipes))
+        relations.prime(Cart, (recipe.id for recipe in recipes))
+        relations.prime(Subscribe, (recipe.author_id for recipe in recipes))
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_author_subscribed'):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
+    def to_shared_representation(self, instance):
+        data = self.to_representation(instance)
+        for name in self.viewer_fields:
+            data[name] = None
+        data['author']['is_subscribed'] = None
+        return data
+
+    def get_is_author_subscribed(self, obj):
+        if hasattr(obj, 'is_author_subscribed'):
+            return obj.is_author_subscribed
+        return self.viewer_has(Subscribe, obj.author_id)
+
+    def overlay_viewer_fields(self, data, instance):
+        data = {**data, 'author': {
+            **data['author'],
+            'is_subscribed': self.get_is_author_subscribed(instance)
+        }}
+        for name in self.viewer_fields:
+            field = self.fields[name]
+            data[name] = field.to_representation(field.get_attribute(instance))
+        return data
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Favorite.objects.filter(
-                user=request.user,
-                recipe=obj
-            ).exists()
-        )
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return self.viewer_has(Favorite, obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Cart.objects.filter(
-                user=request.user,
-                recipe=obj
-            ).exists()
-        )
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return self.viewer_has(Cart, obj.id)
+
+
+class PantryRecipeSerializer(RecipeListSerializer):
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+    viewer_fields = RecipeListSerializer.viewer_fields + ('matched', 'missing')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -230,10 +316,26 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
+class IngredientSearchSerializer(serializers.Serializer):
+    name = serializers.CharField(allow_blank=True)
+    limit = serializers.IntegerField(min_value=1, required=False)
+    contains = serializers.BooleanField(default=False)
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS
+    )
+    max_missing = serializers.IntegerField(
+        min_value=0,
+        default=settings.PANTRY_MAX_MISSING
     )
+
+
+class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -256,24 +358,68 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
     ingredients = RecipeIngredientCreateSerializer(many=True)
     cooking_time = serializers.IntegerField()
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date', 'author')
+        exclude = (
+            'pub_date', 'modified', 'author', 'image_variants', 'search_vector'
+        )
 
-    def create_ingredients(self, recipe, ingredients):
+    def create_ingredients(self, recipe, amounts):
         RecipeIngredient.objects.bulk_create([
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=Ingredient.objects.get(id=i['id'].id),
-                amount=i['amount']
-            ) for i in ingredients
+                ingredient_id=ingredient_id,
+                amount=amount
+            ) for ingredient_id, amount in amounts.items()
         ])
 
+    def update_ingredients(self, recipe, amounts):
+        current = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in current.items()
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        deltas = {}
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != item.amount:
+                deltas[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount', ))
+        created = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        }
+        self.create_ingredients(recipe, created)
+        shopping_list.recipe_changed(recipe.id, {**deltas, **created})
+        return old_amounts
+
+    def save(self, **kwargs):
+        image = self.validated_data.get('image')
+        try:
+            return super().save(**kwargs)
+        finally:
+            if image is not None:
+                image.close()
+
+    def get_amounts(self, ingredients):
+        return {i['id']: i['amount'] for i in ingredients}
+
     @atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
@@ -282,17 +428,27 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             author=self.context['request'].user,
             **validated_data
         )
-        self.create_ingredients(recipe, ingredients)
+        self.create_ingredients(recipe, self.get_amounts(ingredients))
+        record_changes((recipe.id, ))
         recipe.tags.set(tags)
+        schedule_recipe_image(recipe.id)
         return recipe
 
     @atomic
     def update(self, recipe, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        recipe.ingredients.clear()
-        self.create_ingredients(recipe, ingredients)
+        new_amounts = self.get_amounts(ingredients)
+        with shopping_list.collect_changes():
+            old_amounts = self.update_ingredients(recipe, new_amounts)
+        if old_amounts.keys() != new_amounts.keys():
+            record_changes((recipe.id, ))
         recipe.tags.set(tags)
+        if is_stored(recipe.image, validated_data.get('image')):
+            validated_data.pop('image')
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
+            schedule_recipe_image(recipe.id)
         return super().update(recipe, validated_data)
 
     def validate(self, data):
@@ -300,6 +456,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         NO_TAG_ERROR = 'В рецепте не могут отсутствовать теги'
         INGREDIENT_DUPLICATE_ERROR = 'Ингредиенты не могут дублироваться'
         TAG_DUPLICATE_ERROR = 'Теги не могут дублироваться'
+        INGREDIENT_NOT_FOUND_ERROR = 'Ингредиенты не найдены: {}'
+        TAG_NOT_FOUND_ERROR = 'Теги не найдены: {}'
         COOKING_TIME_ERROR = (
             'Допустимые значения времени приготовления: '
             f'{settings.COOKING_TIME_MIN} - '
@@ -311,20 +469,39 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         tags = data.get('tags')
         if not tags:
             raise serializers.ValidationError(NO_TAG_ERROR)
-        validated_ingredients = []
-        for ingredient in ingredients:
-            if ingredient not in validated_ingredients:
-                validated_ingredients.append(ingredient)
-            else:
-                raise serializers.ValidationError(INGREDIENT_DUPLICATE_ERROR)
-        if len(tags) != len(set(tags)):
+        ingredient_ids = {ingredient['id'] for ingredient in ingredients}
+        if len(ingredient_ids) != len(ingredients):
+            raise serializers.ValidationError(INGREDIENT_DUPLICATE_ERROR)
+        tag_ids = set(tags)
+        if len(tag_ids) != len(tags):
             raise serializers.ValidationError(TAG_DUPLICATE_ERROR)
+        missing = ingredient_ids - set(Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                INGREDIENT_NOT_FOUND_ERROR.format(
+                    ', '.join(map(str, sorted(missing)))
+                )
+            )
+        missing = tag_ids - set(Tag.objects.filter(
+            id__in=tag_ids
+        ).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                TAG_NOT_FOUND_ERROR.format(
+                    ', '.join(map(str, sorted(missing)))
+                )
+            )
         time = data.get('cooking_time')
         if not settings.COOKING_TIME_MAX >= time >= settings.COOKING_TIME_MIN:
             raise serializers.ValidationError(COOKING_TIME_ERROR)
         return data
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            (instance, ), *get_representation_prefetches()
+        )
         return RecipeListSerializer(
             instance,
             context=self.context
@@ -0,0 +1,41 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path
+
+from api.async_views import urlpatterns as async_urlpatterns
+from api.urls import urlpatterns as api_urlpatterns
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Tag
+
+urlpatterns = [path('api/', include(async_urlpatterns + api_urlpatterns))]
+
+PATHS = ('/api/tags/', '/api/recipes/', '/api/recipes/{recipe}/')
+
+
+@async_to_sync
+async def fetch(method, url):
+    return await getattr(AsyncClient(), method)(url)
+
+
+@override_settings(CACHES=TEST_CACHES, ROOT_URLCONF=__name__)
+class AsyncReadViewTests(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+        tag = Tag.objects.create(name='Тег', slug='tag', color='#000000')
+        self.recipe = create_recipe(create_user('author'), 'Рецепт')
+        self.recipe.tags.set((tag, ))
+
+    def test_reads_match_sync_views(self):
+        for url in PATHS:
+            url = url.format(recipe=self.recipe.id)
+            with self.subTest(url=url):
+                response = fetch('get', url)
+                self.assertEqual(response.status_code, 200)
+                with override_settings(ROOT_URLCONF='foodgram.urls'):
+                    expected = self.client.get(url)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_writes_stay_authenticated(self):
+        response = fetch('post', '/api/recipes/')
+        self.assertEqual(response.status_code, 401)
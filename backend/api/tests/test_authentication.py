@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication, TokenCache
+from foodgram.tests.utils import TEST_CACHES, clear_caches, create_user
+
+
+def make_worker():
+    worker = CachedTokenAuthentication()
+    worker.local_cache = TokenCache(100, 60)
+    return worker
+
+
+@override_settings(CACHES=TEST_CACHES, AUTH_TOKEN_CACHE_ALIAS='default')
+class CachedTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.other = create_user('other')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other_token = Token.objects.create(user=cls.other)
+
+    def setUp(self):
+        clear_caches()
+        self.workers = [make_worker(), make_worker()]
+        for worker in self.workers:
+            for token in (self.token, self.other_token):
+                worker.authenticate_credentials(token.key)
+
+    def authenticate(self, worker, token=None):
+        return worker.authenticate_credentials((token or self.token).key)
+
+    def change_user(self, update_fields=None, **fields):
+        for field, value in fields.items():
+            setattr(self.user, field, value)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.save(update_fields=update_fields)
+        return callbacks
+
+    def assert_cached(self, worker, token=None):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(worker, token)
+        return user
+
+    def assert_reloaded(self, worker, token=None):
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(worker, token)
+        return user
+
+    def test_cached_lookup_skips_database(self):
+        for worker in self.workers:
+            self.assertEqual(self.assert_cached(worker).id, self.user.id)
+
+    def test_unknown_token_is_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.workers[0].authenticate_credentials('0' * 40)
+
+    def test_deleted_token_is_rejected_by_every_worker(self):
+        key = self.token.key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        for worker in self.workers:
+            with self.assertRaises(AuthenticationFailed):
+                worker.authenticate_credentials(key)
+        self.assert_cached(self.workers[1], self.other_token)
+
+    def test_deactivated_user_is_rejected_by_every_worker(self):
+        self.change_user(is_active=False)
+        for worker in self.workers:
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(worker)
+        self.assert_cached(self.workers[1], self.other_token)
+
+    def test_password_change_reloads_only_that_user(self):
+        self.user.set_password('changed')
+        self.change_user(update_fields=('password', ))
+        self.assert_reloaded(self.workers[1])
+        self.assert_cached(self.workers[1])
+        self.assert_cached(self.workers[1], self.other_token)
+
+    def test_rolled_back_change_keeps_entries(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                raise ValueError
+        self.assertEqual(callbacks, [])
+        self.assert_cached(self.workers[1])
+
+    def test_other_fields_keep_entries(self):
+        self.assertEqual(
+            self.change_user(first_name='Новое', last_name='Имя'), []
+        )
+        self.assert_cached(self.workers[1])
+
+    def test_stamp_eviction_forces_reload(self):
+        clear_caches()
+        self.assert_reloaded(self.workers[1])
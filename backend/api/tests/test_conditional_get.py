@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Favorite, Ingredient, Recipe, Tag
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.other = create_user('other')
+        cls.tag = Tag.objects.create(name='Тег', slug='tag', color='#000000')
+        Ingredient.objects.create(name='Мука', measurement_unit='г')
+        cls.recipe = create_recipe(create_user('author'), 'Рецепт')
+        cls.recipe.tags.set((cls.tag, ))
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, etag=None, client=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return (client or self.client).get(url, **headers)
+
+    def assertRevalidates(self, url, client=None):
+        response = self.get(url, client=client)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        cached = self.get(url, etag, client)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(cached.content, b'')
+        return etag
+
+    def test_reference_lists_revalidate_until_changed(self):
+        for url, create in (
+            ('/api/tags/', lambda: Tag.objects.create(
+                name='Новый', slug='new', color='#FFFFFF'
+            )),
+            ('/api/ingredients/?name=Му', lambda: Ingredient.objects.create(
+                name='Мускат', measurement_unit='г'
+            )),
+        ):
+            with self.subTest(url=url):
+                etag = self.assertRevalidates(url)
+                with self.captureOnCommitCallbacks(execute=True):
+                    create()
+                response = self.get(url, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_recipe_detail_depends_on_viewer(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        etag = self.assertRevalidates(url)
+        response = self.get(url)
+        self.assertIn('Authorization', response['Vary'])
+        other = APIClient()
+        other.force_authenticate(self.other)
+        self.assertEqual(self.get(url, etag, other).status_code, 304)
+        Favorite.objects.create(user=self.other, recipe=self.recipe)
+        self.assertEqual(self.get(url, etag, other).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_favorited'])
+
+    def test_recipe_detail_changes_with_recipe(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        etag = self.assertRevalidates(url)
+        recipe = Recipe.objects.get(id=self.recipe.id)
+        recipe.name = 'Другое название'
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Другое название')
+
+    def test_missing_recipe(self):
+        self.assertEqual(self.get('/api/recipes/0/').status_code, 404)
@@ -0,0 +1,55 @@
+import base64
+import io
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.fields import Base64ImageField
+from foodgram.tests.utils import TEST_CACHES, clear_caches, create_user
+
+
+def encode_image(size=(4, 3)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Base64ImageFieldTests(SimpleTestCase):
+    def test_decodes_to_temporary_file(self):
+        upload = Base64ImageField().to_internal_value(encode_image())
+        self.assertEqual(upload.name, 'upload.png')
+        self.assertEqual(upload.image.size, (4, 3))
+        self.assertEqual(len(upload.content_hash), 64)
+
+    def test_rejects_invalid_base64(self):
+        with self.assertRaises(ValidationError):
+            Base64ImageField().to_internal_value(encode_image() + 'A')
+
+    @override_settings(IMAGE_MAX_SIZE=64)
+    def test_rejects_large_image_before_decoding(self):
+        field = Base64ImageField()
+        with self.assertRaises(ValidationError) as error:
+            field.decode('data:image/png;base64,' + 'A' * 1024)
+        self.assertEqual(error.exception.detail[0].code, 'max_size')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_rejects_too_many_pixels(self):
+        with self.assertRaises(ValidationError) as error:
+            Base64ImageField().to_internal_value(encode_image((20, 10)))
+        self.assertEqual(error.exception.detail[0].code, 'max_pixels')
+
+
+@override_settings(CACHES=TEST_CACHES, DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+class RequestSizeTests(TestCase):
+    def test_large_json_body_is_rejected(self):
+        clear_caches()
+        client = APIClient()
+        client.force_authenticate(create_user('author'))
+        response = client.post(
+            '/api/recipes/', {'image': 'A' * 2048}, format='json'
+        )
+        self.assertEqual(response.status_code, 413)
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.serializers import RecipeListSerializer
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Favorite, Ingredient, Recipe, RecipeIngredient
+from users.models import Subscribe, User
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.readers = [create_user(f'reader{number}') for number in (1, 2)]
+        ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        cls.recipes = [
+            create_recipe(cls.author, f'Рецепт {number}')
+            for number in range(2)
+        ]
+        for recipe in cls.recipes:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=100
+            )
+        Favorite.objects.create(user=cls.readers[0], recipe=cls.recipes[0])
+        Subscribe.objects.create(user=cls.readers[1], author=cls.author)
+
+    def setUp(self):
+        clear_caches()
+        self.clients = []
+        for reader in self.readers:
+            client = APIClient()
+            client.force_authenticate(reader)
+            self.clients.append(client)
+
+    def get_list(self, client):
+        with mock.patch.object(
+            RecipeListSerializer, 'to_shared_representation',
+            autospec=True,
+            side_effect=RecipeListSerializer.to_shared_representation
+        ) as shared:
+            response = client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item for item in response.data['results']
+        }, shared.call_count
+
+    def test_shared_part_is_built_once_for_all_viewers(self):
+        first, built = self.get_list(self.clients[0])
+        self.assertEqual(built, 2)
+        second, built = self.get_list(self.clients[1])
+        self.assertEqual(built, 0)
+        recipe_id = self.recipes[0].id
+        self.assertTrue(first[recipe_id]['is_favorited'])
+        self.assertFalse(first[recipe_id]['author']['is_subscribed'])
+        self.assertFalse(second[recipe_id]['is_favorited'])
+        self.assertTrue(second[recipe_id]['author']['is_subscribed'])
+        self.assertEqual(
+            first[recipe_id]['ingredients'], second[recipe_id]['ingredients']
+        )
+
+    def test_recipe_change_rebuilds_its_fragment(self):
+        self.get_list(self.clients[0])
+        recipe = Recipe.objects.get(id=self.recipes[0].id)
+        recipe.name = 'Новое название'
+        recipe.save()
+        items, built = self.get_list(self.clients[1])
+        self.assertEqual(built, 1)
+        self.assertEqual(items[recipe.id]['name'], 'Новое название')
+
+    def test_author_change_rebuilds_fragments(self):
+        self.get_list(self.clients[0])
+        User.objects.filter(id=self.author.id).update(first_name='Иван')
+        items, built = self.get_list(self.clients[0])
+        self.assertEqual(built, 2)
+        self.assertEqual(
+            items[self.recipes[1].id]['author']['first_name'], 'Иван'
+        )
+
+    def test_favorite_count_change_rebuilds_fragment(self):
+        self.get_list(self.clients[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(
+                user=self.readers[1], recipe=self.recipes[1]
+            )
+        items, built = self.get_list(self.clients[1])
+        self.assertEqual(built, 1)
+        self.assertTrue(items[self.recipes[1].id]['is_favorited'])
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Recipe
+from users.models import Subscribe, User
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [create_user(f'author{number}') for number in range(5)]
+        for author in cls.authors:
+            Subscribe.objects.create(user=cls.user, author=author)
+            for number in range(2):
+                create_recipe(author, f'{author.username} {number}')
+        now = timezone.now()
+        for index, recipe_id in enumerate(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        ):
+            Recipe.objects.filter(id=recipe_id).update(
+                pub_date=now - timedelta(minutes=index // 3)
+            )
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_recipes_round_trip_with_equal_dates(self):
+        self.assertEqual(
+            self.walk('/api/recipes/?pagination=cursor&limit=3'),
+            list(Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            ))
+        )
+
+    def test_users_round_trip(self):
+        self.assertEqual(
+            self.walk('/api/users/?pagination=cursor&limit=3'),
+            list(User.objects.order_by('id').values_list('id', flat=True))
+        )
+
+    def test_subscriptions_round_trip(self):
+        self.assertEqual(
+            self.walk(
+                '/api/users/subscriptions/?pagination=cursor&limit=3'
+                '&recipes_limit=1'
+            ),
+            [author.id for author in self.authors]
+        )
+
+    def test_cursor_keeps_filters(self):
+        author = self.authors[0]
+        self.assertEqual(
+            self.walk(
+                f'/api/recipes/?pagination=cursor&limit=1&author={author.id}'
+            ),
+            list(author.recipes.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            ))
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'WzFd', 'eyJhIjogMX0='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/recipes/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_still_report_count(self):
+        response = self.client.get('/api/recipes/?page=2&limit=4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(len(response.data['results']), 4)
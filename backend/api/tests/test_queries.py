@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import TEST_CACHES, clear_caches
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Subscribe, User
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Читатель', last_name='Тестовый', password='pass'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag-{number}',
+                color=f'#00000{number}'
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        for number in range(4):
+            author = User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}',
+                first_name='Автор', last_name=str(number), password='pass'
+            )
+            Subscribe.objects.create(user=cls.user, author=author)
+            for index in range(3):
+                recipe = Recipe.objects.create(
+                    author=author, name=f'Рецепт {number}-{index}',
+                    text='Описание', cooking_time=10,
+                    image='recipes/images/test.png'
+                )
+                recipe.tags.set(tags[index:])
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe=recipe, ingredient=ingredient, amount=10
+                    )
+                    for ingredient in ingredients[index:]
+                )
+        cls.recipe = recipe
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_queries(self, number, url):
+        clear_caches()
+        with self.assertNumQueries(number):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipe_list(self):
+        for limit in (2, 6):
+            with self.subTest(limit=limit):
+                response = self.assert_queries(
+                    7, f'/api/recipes/?limit={limit}'
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_recipe_detail(self):
+        self.assert_queries(6, f'/api/recipes/{self.recipe.id}/')
+
+    def test_subscriptions(self):
+        for limit in (2, 4):
+            with self.subTest(limit=limit):
+                response = self.assert_queries(
+                    3, f'/api/users/subscriptions/?limit={limit}'
+                    '&recipes_limit=2'
+                )
+                self.assertEqual(len(response.data['results']), limit)
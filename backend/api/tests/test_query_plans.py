@@ -0,0 +1,140 @@
+import json
+import re
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import (Cart, Favorite, Ingredient, RecipeIngredient,
+                            Tag)
+from recipes.popularity import refresh_popularity
+from users.models import Subscribe
+
+ENDPOINTS = (
+    '/api/recipes/',
+    '/api/recipes/?pagination=cursor',
+    '/api/recipes/?is_favorited=1',
+    '/api/recipes/?is_in_shopping_cart=1',
+    '/api/recipes/?tags={tag}',
+    '/api/recipes/?author={author}',
+    '/api/recipes/popular/',
+    '/api/recipes/feed/',
+    '/api/recipes/{recipe}/',
+    '/api/recipes/shopping_list/',
+    '/api/recipes/download_shopping_cart/',
+    '/api/users/',
+    '/api/users/{author}/',
+    '/api/users/me/',
+    '/api/users/subscriptions/?recipes_limit=3',
+    '/api/tags/',
+    '/api/ingredients/?name=Ингр',
+)
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def postgresql_scans(node):
+    if node['Node Type'] == 'Seq Scan':
+        yield node['Relation Name']
+    for child in node.get('Plans', ()):
+        yield from postgresql_scans(child)
+
+
+def is_primary_key_order(cursor, sql, table):
+    column = connection.introspection.get_primary_key_column(cursor, table)
+    return re.search(
+        rf'ORDER BY "{table}"\."{column}" (ASC|DESC)( LIMIT|$)', sql
+    ) is not None
+
+
+def explain(sql, params, tables):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return set(postgresql_scans(plan[0]['Plan'])) & tables
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        details = [detail for *_, detail in cursor.fetchall()]
+        sorted_in_memory = any(
+            detail.startswith('USE TEMP B-TREE FOR ORDER BY')
+            for detail in details
+        )
+        return {
+            match.group(1)
+            for detail in details
+            for match in (SQLITE_SCAN.match(detail), )
+            if match and match.group(1) in tables and (
+                sorted_in_memory
+                or not is_primary_key_order(cursor, sql, match.group(1))
+            )
+        }
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        authors = [create_user(f'author{number}') for number in range(3)]
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag-{number}',
+                color=f'#00000{number}'
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        for author in authors:
+            Subscribe.objects.create(user=cls.user, author=author)
+            for number in range(3):
+                recipe = create_recipe(author, f'{author.username} {number}')
+                recipe.tags.set(tags[number:])
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe=recipe, ingredient=ingredient, amount=10
+                    )
+                    for ingredient in ingredients[number:]
+                )
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+                Cart.objects.create(user=cls.user, recipe=recipe)
+        refresh_popularity(full=True)
+        cls.context = {
+            'recipe': recipe.id, 'author': author.id, 'tag': tags[0].slug
+        }
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def capture(self, url):
+        queries = []
+
+        def collect(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return queries
+
+    def test_hot_endpoints_use_indexes(self):
+        tables = set(connection.introspection.table_names())
+        for endpoint in ENDPOINTS:
+            url = endpoint.format(**self.context)
+            for sql, params in self.capture(url):
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(explain(sql, params, tables), set())
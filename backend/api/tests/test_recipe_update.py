@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Ingredient, RecipeIngredient, Tag
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.tag = Tag.objects.create(name='Тег', slug='tag', color='#000000')
+        cls.recipe = create_recipe(cls.author, 'Блины')
+        cls.recipe.tags.set((cls.tag, ))
+        for ingredient in cls.ingredients[:3]:
+            RecipeIngredient.objects.create(
+                recipe=cls.recipe, ingredient=ingredient, amount=100
+            )
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def patch(self, ingredients, tags=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                f'/api/recipes/{self.recipe.id}/', {
+                    'name': 'Блины',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'tags': tags or [self.tag.id],
+                    'ingredients': [
+                        {'id': ingredient_id, 'amount': amount}
+                        for ingredient_id, amount in ingredients
+                    ],
+                }, format='json'
+            )
+
+    def rows(self):
+        return {
+            item.ingredient_id: (item.id, item.amount)
+            for item in RecipeIngredient.objects.filter(recipe=self.recipe)
+        }
+
+    def test_only_changed_rows_are_touched(self):
+        first, second, third, fourth = (
+            ingredient.id for ingredient in self.ingredients
+        )
+        before = self.rows()
+        response = self.patch(((first, 100), (second, 250), (fourth, 5)))
+        self.assertEqual(response.status_code, 200, response.data)
+        after = self.rows()
+        self.assertEqual(after.keys(), {first, second, fourth})
+        self.assertEqual(after[first], before[first])
+        self.assertEqual(after[second], (before[second][0], 250))
+        self.assertEqual(after[fourth][1], 5)
+
+    def test_ingredients_resolved_in_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.patch(
+                (ingredient.id, 10) for ingredient in self.ingredients
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        table = Ingredient._meta.db_table
+        self.assertEqual(len([
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+        ]), 1)
+
+    def test_invalid_ingredients_and_tags(self):
+        first = self.ingredients[0].id
+        missing = max(ingredient.id for ingredient in self.ingredients) + 1
+        for ingredients, tags, message in (
+            (((first, 10), (first, 20)), None, 'дублироваться'),
+            (((first, 10), (missing, 5)), None, f'не найдены: {missing}'),
+            (((first, 10), ), [self.tag.id, self.tag.id + 1], 'Теги'),
+        ):
+            with self.subTest(message=message):
+                response = self.patch(ingredients, tags)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, str(response.data))
+        self.assertEqual(len(self.rows()), 3)
@@ -0,0 +1,140 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import (Cart, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingListItem)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BulkRelationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        author = create_user('author')
+        cls.ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        cls.recipes = [
+            create_recipe(author, f'Рецепт {number}') for number in range(3)
+        ]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=cls.ingredient, amount=100
+            )
+            for recipe in cls.recipes
+        )
+        cls.missing = max(recipe.id for recipe in cls.recipes) + 1
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, method, url, recipe_ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(
+                url, {'recipes': recipe_ids}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return [item['status'] for item in response.data]
+
+    def counts(self, field):
+        return list(Recipe.objects.filter(
+            id__in=[recipe.id for recipe in self.recipes]
+        ).order_by('id').values_list(field, flat=True))
+
+    def shopping_amount(self):
+        item = ShoppingListItem.objects.filter(user=self.user).first()
+        return item and item.amount
+
+    def test_add_mixed_ids(self):
+        first, second, _ = (recipe.id for recipe in self.recipes)
+        Favorite.objects.create(user=self.user, recipe_id=first)
+        self.assertEqual(
+            self.bulk('post', '/api/recipes/favorite/',
+                      [first, second, self.missing, second]),
+            ['exists', 'added', 'not_found']
+        )
+        self.assertEqual(self.counts('favorites_count'), [1, 1, 0])
+        self.assertEqual(
+            set(Favorite.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            {first, second}
+        )
+
+    def test_remove_mixed_ids(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        for recipe_id in (first, second):
+            Favorite.objects.create(user=self.user, recipe_id=recipe_id)
+        self.assertEqual(
+            self.bulk('delete', '/api/recipes/favorite/',
+                      [first, third, self.missing, second]),
+            ['removed', 'absent', 'not_found', 'removed']
+        )
+        self.assertEqual(self.counts('favorites_count'), [0, 0, 0])
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+
+    def test_cart_changes_shopping_list(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        Cart.objects.create(user=self.user, recipe_id=first)
+        self.assertEqual(self.shopping_amount(), 100)
+        self.assertEqual(
+            self.bulk('post', '/api/recipes/shopping_cart/',
+                      [first, second, third]),
+            ['exists', 'added', 'added']
+        )
+        self.assertEqual(self.shopping_amount(), 300)
+        self.assertEqual(self.counts('in_carts_count'), [1, 1, 1])
+        self.assertEqual(
+            self.bulk('delete', '/api/recipes/shopping_cart/',
+                      [second, third, self.missing]),
+            ['removed', 'removed', 'not_found']
+        )
+        self.assertEqual(self.shopping_amount(), 100)
+        self.assertEqual(self.counts('in_carts_count'), [1, 0, 0])
+        Cart.objects.filter(user=self.user).delete()
+        self.assertIsNone(self.shopping_amount())
+        self.assertEqual(self.counts('in_carts_count'), [0, 0, 0])
+
+    def test_single_and_bulk_paths_agree(self):
+        first, second, _ = (recipe.id for recipe in self.recipes)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/recipes/{first}/shopping_cart/'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.bulk('post', '/api/recipes/shopping_cart/', [second])
+        self.assertEqual(self.shopping_amount(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f'/api/recipes/{first}/shopping_cart/'
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.client.delete(
+                f'/api/recipes/{first}/shopping_cart/'
+            ).status_code,
+            400
+        )
+        self.assertEqual(self.shopping_amount(), 100)
+        self.assertEqual(self.counts('in_carts_count'), [0, 1, 0])
+
+    def test_bulk_delete_batches_side_effects(self):
+        recipe_ids = [recipe.id for recipe in self.recipes]
+        queries = []
+        for size in (1, 3):
+            Cart.objects.bulk_create(
+                Cart(user=self.user, recipe_id=recipe_id)
+                for recipe_id in recipe_ids[:size]
+            )
+            with CaptureQueriesContext(connection) as context:
+                self.bulk(
+                    'delete', '/api/recipes/shopping_cart/', recipe_ids
+                )
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
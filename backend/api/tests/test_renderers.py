@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.renderers import (ShoppingListCSVRenderer, ShoppingListJSONRenderer,
+                           ShoppingListPDFRenderer, ShoppingListRenderer,
+                           ShoppingListTextRenderer, chunked)
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Cart, Ingredient, RecipeIngredient
+
+ITEMS = (('Соль', 'г', 5), ('Мука "высший", сорт', 'кг', 2))
+
+
+def render(renderer_class, items):
+    return b''.join(renderer_class().stream(iter(items)))
+
+
+class ShoppingListRendererTests(SimpleTestCase):
+    def test_base_renderer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ShoppingListRenderer()
+
+    def test_chunked_joins_parts_up_to_size(self):
+        self.assertEqual(
+            list(chunked((b'ab', b'cd', b'e'), size=3)), [b'abcd', b'e']
+        )
+
+    def test_text(self):
+        self.assertEqual(
+            render(ShoppingListTextRenderer, ITEMS).decode(),
+            'Соль - 5 г\nМука "высший", сорт - 2 кг\n'
+        )
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(
+            render(ShoppingListCSVRenderer, ITEMS).decode()
+        )))
+        self.assertEqual(rows, [
+            list(ShoppingListCSVRenderer.header),
+            ['Соль', '5', 'г'],
+            ['Мука "высший", сорт', '2', 'кг'],
+        ])
+
+    def test_json(self):
+        self.assertEqual(json.loads(render(ShoppingListJSONRenderer, ITEMS)), [
+            {'name': name, 'measurement_unit': unit, 'amount': amount}
+            for name, unit, amount in ITEMS
+        ])
+        self.assertEqual(json.loads(render(ShoppingListJSONRenderer, ())), [])
+
+    def test_pdf_xref_offsets_point_to_objects(self):
+        items = [(f'Ингредиент {number}', 'г', number) for number in range(60)]
+        content = render(ShoppingListPDFRenderer, items)
+        self.assertTrue(content.startswith(b'%PDF-1.4\n'))
+        self.assertTrue(content.endswith(b'%%EOF\n'))
+        startxref = int(content.rsplit(b'startxref\n', 1)[1].split()[0])
+        xref = content[startxref:].split(b'trailer', 1)[0].splitlines()
+        self.assertEqual(xref[0], b'xref')
+        size = int(xref[1].split()[1])
+        self.assertEqual(size, 8)
+        for number, entry in enumerate(xref[3:3 + size - 1], 1):
+            offset = int(entry.split()[0])
+            self.assertTrue(
+                content[offset:].startswith(b'%d 0 obj' % number), number
+            )
+        self.assertIn(b'/Count 2', content)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DownloadShoppingCartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        recipe = create_recipe(create_user('author'), 'Суп')
+        for number, name in enumerate(('Соль', 'Вода'), 1):
+            RecipeIngredient.objects.create(
+                recipe=recipe,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit='г'
+                ),
+                amount=number * 10
+            )
+        Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, format):
+        response = self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={format}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename=shoplist.{format}'
+        )
+        return response, b''.join(response.streaming_content)
+
+    def test_formats(self):
+        response, content = self.download('txt')
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(
+            sorted(content.decode().splitlines()),
+            ['Вода - 20 г', 'Соль - 10 г']
+        )
+        response, content = self.download('json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            sorted(item['name'] for item in json.loads(content)),
+            ['Вода', 'Соль']
+        )
+        response, content = self.download('csv')
+        self.assertEqual(len(content.decode().splitlines()), 3)
+        response, content = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Recipe
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.in_name = create_recipe(author, 'Борщ украинский')
+        cls.in_text = create_recipe(
+            author, 'Суп дня', text='Почти как БОРЩ, но без свёклы'
+        )
+        cls.both = create_recipe(
+            author, 'Зелёный борщ', text='Щавелевый борщ со сметаной'
+        )
+        cls.other = create_recipe(author, 'Блины', text='Мука и молоко')
+        now = timezone.now()
+        for minutes, recipe in enumerate(
+            (cls.both, cls.in_text, cls.in_name, cls.other)
+        ):
+            Recipe.objects.filter(id=recipe.id).update(
+                pub_date=now - timedelta(minutes=minutes)
+            )
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_name_matches_rank_above_text_matches(self):
+        self.assertEqual(
+            self.search('борщ'),
+            [self.both.id, self.in_name.id, self.in_text.id]
+        )
+
+    def test_case_is_folded_on_both_sides(self):
+        for value in ('БОРЩ', 'Борщ', 'борщ'):
+            with self.subTest(value=value):
+                self.assertEqual(len(self.search(value)), 3)
+        self.assertEqual(self.search('СВЁКЛЫ'), [self.in_text.id])
+
+    def test_all_tokens_must_match(self):
+        self.assertEqual(self.search('борщ сметаной'), [self.both.id])
+        self.assertEqual(self.search('борщ молоко'), [])
+
+    def test_blank_search_is_ignored(self):
+        self.assertEqual(len(self.search('   ')), 4)
+        self.assertEqual(self.search('!!!'), [])
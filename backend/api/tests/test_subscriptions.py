@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Recipe
+from users.models import Subscribe
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SubscriptionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [create_user(f'author{number}') for number in range(3)]
+        now = timezone.now()
+        cls.recipes = {}
+        for number, author in enumerate(cls.authors):
+            Subscribe.objects.create(user=cls.user, author=author)
+            for index in range(number + 2):
+                recipe = create_recipe(author, f'{author.username} {index}')
+                Recipe.objects.filter(id=recipe.id).update(
+                    pub_date=now - timedelta(days=index)
+                )
+                cls.recipes.setdefault(author.id, []).append(recipe.id)
+        cls.stranger = create_user('stranger')
+        create_recipe(cls.stranger, 'Чужой рецепт')
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_subscriptions(self, query=''):
+        response = self.client.get(f'/api/users/subscriptions/{query}')
+        self.assertEqual(response.status_code, 200)
+        return {
+            author['id']: author for author in response.data['results']
+        }
+
+    def test_recipes_limit_keeps_newest_per_author(self):
+        authors = self.get_subscriptions('?recipes_limit=2')
+        self.assertEqual(set(authors), {author.id for author in self.authors})
+        for author_id, author in authors.items():
+            with self.subTest(author=author_id):
+                self.assertEqual(
+                    [recipe['id'] for recipe in author['recipes']],
+                    self.recipes[author_id][:2]
+                )
+                self.assertEqual(
+                    author['recipes_count'], len(self.recipes[author_id])
+                )
+                self.assertTrue(author['is_subscribed'])
+
+    def test_without_limit_returns_all_recipes(self):
+        for author_id, author in self.get_subscriptions().items():
+            self.assertEqual(
+                len(author['recipes']), len(self.recipes[author_id])
+            )
+
+    def test_zero_limit(self):
+        for author in self.get_subscriptions('?recipes_limit=0').values():
+            self.assertEqual(author['recipes'], [])
+
+    def test_invalid_limit(self):
+        for limit in ('-1', 'abc'):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    f'/api/users/subscriptions/?recipes_limit={limit}'
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_query_count_does_not_grow_with_authors(self):
+        with self.assertNumQueries(3):
+            self.client.get('/api/users/subscriptions/?recipes_limit=1')
+
+    def test_subscribe_applies_limit(self):
+        response = self.client.post(
+            f'/api/users/{self.stranger.id}/subscribe/?recipes_limit=0'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recipes'], [])
+        self.assertEqual(response.data['recipes_count'], 1)
+        self.assertTrue(response.data['is_subscribed'])
@@ -0,0 +1,97 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.loaders import ViewerRelations, get_viewer_relations
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Cart, Favorite
+from recipes.popularity import refresh_popularity
+from users.models import Subscribe
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ViewerRelationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [create_user(f'author{number}') for number in range(3)]
+        Subscribe.objects.create(user=cls.user, author=cls.authors[0])
+        cls.recipes = [
+            create_recipe(author, f'Рецепт {author.username}')
+            for author in cls.authors
+        ]
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Cart.objects.create(user=cls.user, recipe=cls.recipes[2])
+
+    def setUp(self):
+        clear_caches()
+
+    def test_prime_loads_each_model_once(self):
+        relations = ViewerRelations(self.user)
+        author_ids = [author.id for author in self.authors]
+        with self.assertNumQueries(1):
+            relations.prime(Subscribe, author_ids)
+            relations.prime(Subscribe, author_ids[:1])
+            self.assertEqual(
+                [relations.contains(Subscribe, id) for id in author_ids],
+                [True, False, False]
+            )
+
+    def test_add_and_discard_skip_queries(self):
+        relations = ViewerRelations(self.user)
+        recipe_id = self.recipes[0].id
+        with self.assertNumQueries(0):
+            relations.add(Favorite, recipe_id)
+            self.assertTrue(relations.contains(Favorite, recipe_id))
+            relations.discard(Favorite, recipe_id)
+            self.assertFalse(relations.contains(Favorite, recipe_id))
+
+    def test_anonymous_viewer_has_no_relations(self):
+        relations = ViewerRelations(AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertFalse(relations.contains(Cart, self.recipes[2].id))
+
+    def test_relations_are_scoped_to_request_user(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        relations = get_viewer_relations(request)
+        self.assertIs(get_viewer_relations(request), relations)
+        request.user = self.authors[0]
+        self.assertIsNot(get_viewer_relations(request), relations)
+
+    def get_results(self, url, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.data['results']}
+
+    def test_user_list_flags(self):
+        users = self.get_results('/api/users/', self.user)
+        self.assertEqual(
+            [users[author.id]['is_subscribed'] for author in self.authors],
+            [True, False, False]
+        )
+        users = self.get_results('/api/users/')
+        self.assertFalse(any(user['is_subscribed'] for user in users.values()))
+
+    @override_settings(POPULARITY_COMMIT_LAG=0)
+    def test_popular_recipe_flags(self):
+        refresh_popularity(full=True)
+        recipes = self.get_results('/api/recipes/popular/', self.user)
+        self.assertEqual(
+            {
+                recipe_id: (
+                    recipe['is_favorited'],
+                    recipe['is_in_shopping_cart'],
+                    recipe['author']['is_subscribed']
+                )
+                for recipe_id, recipe in recipes.items()
+            },
+            {
+                self.recipes[1].id: (True, False, False),
+                self.recipes[2].id: (False, True, False),
+            }
+        )
@@ -1,6 +1,7 @@
 from django.conf import settings
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Prefetch, Value, prefetch_related_objects
+from django.db.transaction import atomic
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as DjoserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
@@ -11,14 +12,26 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
 from api.filters import IngredientFilter, RecipeFilter
-from api.paginators import PageNumberLimitPaginator
+from api.loaders import get_viewer_relations
+from api.mixins import ConditionalGetMixin, VersionETagMixin, make_etag
+from api.paginators import KeysetLimitPaginator, PageNumberLimitPaginator
 from api.permissions import IsAuthAndIsAuthorOrReadOnly
+from api.renderers import (ShoppingListCSVRenderer, ShoppingListJSONRenderer,
+                           ShoppingListPDFRenderer, ShoppingListTextRenderer)
 from api.serializers import (CartSerializer, FavoriteSerializer,
-                             IngredientSerializer, RecipeCreateSerializer,
-                             RecipeListSerializer, SubscribeSerializer,
+                             IngredientSearchSerializer, IngredientSerializer,
+                             PantryRecipeSerializer, PantrySearchSerializer,
+                             RecipeCreateSerializer, RecipeIdsSerializer,
+                             RecipeListSerializer, RecipesLimitSerializer,
+                             ShoppingListItemSerializer, SubscribeSerializer,
                              SubscriptionsSerializer, TagSerializer)
+from foodgram.versions import get_versions
+from recipes import feed
+from recipes.ingredient_index import ingredient_index
 from recipes.models import (Cart, Favorite, Ingredient, Recipe,
-                            RecipeIngredient, Tag)
+                            RecipePopularity, ShoppingListItem, Tag)
+from recipes.pantry_index import pantry_index
+from recipes.relations import add_relations, remove_relations
 from users.models import Subscribe, User
 
 
@@ -28,9 +41,21 @@ class UserViewSet(DjoserViewSet):
     permission_classes = (AllowAny,)
     http_method_names = ('get', 'post', 'delete')
     pagination_class = PageNumberLimitPaginator
+    keyset_ordering = ('id', )
+
+    def get_recipes_limit(self):
+        serializer = RecipesLimitSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data.get('recipes_limit')
+
+    def get_instance(self):
+        user = super().get_instance()
+        user.refresh_from_db()
+        return user
 
     @action(detail=True, methods=('post', 'delete'),
             permission_classes=(IsAuthenticated,))
+    @atomic
     def subscribe(self, request, **kwargs):
         author = get_object_or_404(User, id=kwargs.get('id'))
         if request.method == 'POST':
@@ -40,11 +65,14 @@ class UserViewSet(DjoserViewSet):
                     'author': author.id
                 },
                 context={
-                    'request': request
+                    'request': request,
+                    'recipes_limit': self.get_recipes_limit()
                 }
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            subscription = serializer.save()
+            subscription.author.refresh_from_db(fields=('followers_count', ))
+            get_viewer_relations(request).add(Subscribe, author.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         subscription = Subscribe.objects.filter(
@@ -58,34 +86,103 @@ class UserViewSet(DjoserViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         subscription.delete()
+        get_viewer_relations(request).discard(Subscribe, author.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=('get', ),
             permission_classes=[IsAuthAndIsAuthorOrReadOnly])
     def subscriptions(self, request):
-        queryset = User.objects.filter(following__user=request.user)
+        limit = self.get_recipes_limit()
+        queryset = User.objects.filter(
+            following__user=request.user
+        ).annotate(
+            is_subscribed=Value(True)
+        ).order_by('id')
         page = self.paginate_queryset(queryset)
+        recipes = Recipe.objects.filter(author__in=page)
+        if limit is not None:
+            recipes = recipes.limited_per_author(limit)
+        prefetch_related_objects(page, Prefetch(
+            'recipes', queryset=recipes, to_attr='limited_recipes'
+        ))
         serializer = SubscriptionsSerializer(
             page,
             many=True,
-            context={'request': request}
+            context={'request': request, 'recipes_limit': limit}
         )
         return self.get_paginated_response(serializer.data)
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(ConditionalGetMixin, ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     http_method_names = ('get', 'post', 'patch', 'delete')
     pagination_class = PageNumberLimitPaginator
+    keyset_ordering = ('-pub_date', '-id')
+    count_cache_models = (Recipe, )
+    rank_field = None
+    viewer_count_filters = {
+        'is_favorited': Favorite,
+        'is_in_shopping_cart': Cart
+    }
     permission_classes = (IsAuthAndIsAuthorOrReadOnly, )
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        queryset = Recipe.objects.with_user_flags(self.request.user)
+        if self.action in ('list', 'retrieve', 'popular', 'feed'):
+            return queryset.for_representation(
+                prefetch=self.action == 'retrieve'
+            )
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        versions = get_versions(Tag, Ingredient)
+        state = get_object_or_404(
+            Recipe.objects.with_user_flags(request.user).values(
+                'modified',
+                'is_favorited',
+                'is_in_shopping_cart',
+                'is_author_subscribed',
+                'favorites_count',
+                'in_carts_count',
+                'author__recipes_count',
+                'author__followers_count',
+                'author__email',
+                'author__username',
+                'author__first_name',
+                'author__last_name'
+            ),
+            pk=kwargs['pk']
+        )
+        return self.conditional_response(
+            request,
+            lambda: super(RecipeViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+            make_etag(
+                request.path,
+                sorted(state.items()),
+                versions
+            ),
+            vary=('Authorization', )
+        )
+
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'popular', 'feed'):
             return RecipeListSerializer
         return RecipeCreateSerializer
 
+    def relations_added(self, model, recipe_ids):
+        relations = get_viewer_relations(self.request)
+        for recipe_id in recipe_ids:
+            relations.add(model, recipe_id)
+
+    def relations_removed(self, model, recipe_ids):
+        relations = get_viewer_relations(self.request)
+        for recipe_id in recipe_ids:
+            relations.discard(model, recipe_id)
+
+    @atomic
     def serializer_create(self, user_id, pk, serializer):
         serializer = serializer(
             data={
@@ -94,25 +191,122 @@ class RecipeViewSet(ModelViewSet):
             }
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        instance = serializer.save()
+        self.relations_added(serializer.Meta.model, (instance.recipe_id, ))
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
         )
 
+    @atomic
     def serializer_delete(self, user_id, pk, model):
-        recipe = model.objects.filter(
-            user=user_id,
-            recipe=pk
-        )
-        if not recipe:
+        removed = remove_relations(model, user_id, (pk, ))
+        if not removed:
             return Response(
                 {'errors': 'Рецепта нет в избранном'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        recipe.delete()
+        self.relations_removed(model, removed)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @atomic
+    def bulk_change(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        found = set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        existing = [
+            recipe_id for recipe_id in recipe_ids if recipe_id in found
+        ]
+        if request.method == 'POST':
+            changed = add_relations(model, request.user.id, existing)
+            self.relations_added(model, changed)
+            statuses = ('added', 'exists')
+        else:
+            changed = remove_relations(model, request.user.id, existing)
+            self.relations_removed(model, changed)
+            statuses = ('removed', 'absent')
+        changed = set(changed)
+        return Response([
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in found
+                    else statuses[recipe_id not in changed]
+                )
+            }
+            for recipe_id in recipe_ids
+        ])
+
+    @action(detail=False, methods=('post', 'delete'),
+            permission_classes=(IsAuthenticated, ),
+            url_path='favorite', url_name='favorite-bulk')
+    def favorite_bulk(self, request):
+        return self.bulk_change(request, Favorite)
+
+    @action(detail=False, methods=('post', 'delete'),
+            permission_classes=(IsAuthenticated, ),
+            url_path='shopping_cart', url_name='shopping-cart-bulk')
+    def shopping_cart_bulk(self, request):
+        return self.bulk_change(request, Cart)
+
+    @action(detail=False, methods=('get', ),
+            keyset_ordering=('popularity__rank', 'id'),
+            count_cache_models=(Recipe, RecipePopularity),
+            rank_field='popularity__rank')
+    def popular(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            popularity__isnull=False
+        ).select_related('popularity').order_by('popularity__rank', 'id')
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
+    @action(detail=False, methods=('get', ),
+            permission_classes=(IsAuthenticated, ))
+    def feed(self, request):
+        def load(position, limit):
+            recipe_ids = feed.get_feed(request.user, position, limit)
+            recipes = self.get_queryset().in_bulk(recipe_ids)
+            return [
+                recipes[recipe_id] for recipe_id in recipe_ids
+                if recipe_id in recipes
+            ]
+
+        paginator = KeysetLimitPaginator()
+        page = paginator.paginate(request, self, Recipe, load)
+        return paginator.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
+    @action(detail=False, methods=('get', ),
+            permission_classes=(AllowAny, ))
+    def pantry(self, request):
+        serializer = PantrySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ranked = self.paginate_queryset(pantry_index.search(
+            serializer.validated_data['ingredients'],
+            serializer.validated_data['max_missing'],
+            settings.PANTRY_MAX_RESULTS
+        ))
+        recipes = Recipe.objects.with_user_flags(
+            request.user
+        ).for_representation(prefetch=False).in_bulk(
+            [recipe_id for recipe_id, _, _ in ranked]
+        )
+        page = []
+        for recipe_id, matched, missing in ranked:
+            recipe = recipes.get(recipe_id)
+            if recipe is not None:
+                recipe.matched, recipe.missing = matched, missing
+                page.append(recipe)
+        return self.get_paginated_response(PantryRecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        ).data)
+
     @action(detail=True, methods=('post', 'delete'),
             permission_classes=(IsAuthenticated, ))
     def favorite(self, request, **kwargs):
@@ -128,30 +322,43 @@ class RecipeViewSet(ModelViewSet):
             Favorite
         )
 
+    def get_shopping_list(self):
+        return ShoppingListItem.objects.filter(
+            user=self.request.user
+        ).select_related('ingredient').order_by(
+            'ingredient__name',
+            'ingredient__measurement_unit'
+        )
+
     @action(detail=False, methods=('get', ),
-            permission_classes=(IsAuthAndIsAuthorOrReadOnly, ))
+            permission_classes=(IsAuthenticated, ))
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            self.get_shopping_list(), many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=('get', ),
+            permission_classes=(IsAuthenticated, ),
+            renderer_classes=(ShoppingListTextRenderer,
+                              ShoppingListCSVRenderer,
+                              ShoppingListJSONRenderer,
+                              ShoppingListPDFRenderer))
     def download_shopping_cart(self, request):
-        items = RecipeIngredient.objects.select_related(
-            'recipe', 'ingredient'
-        ).filter(recipe__shopping_carts__user=request.user).values(
+        items = self.get_shopping_list().values_list(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(
-            total=Sum('amount')
+            'ingredient__measurement_unit',
+            'amount'
+        ).iterator(chunk_size=settings.SHOP_LIST_CHUNK_SIZE)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(items),
+            content_type=renderer.content_type
         )
-        items_list = []
-        for item in items:
-            items_list.append(
-                f"{item['ingredient__name']} - "
-                f"{item['total']} {item['ingredient__measurement_unit']}"
-            )
-        RESPONSE_CONTENT_TYPE = 'text/plan'
-        response = HttpResponse(
-            '\n'.join(items_list),
-            content_type=RESPONSE_CONTENT_TYPE
+        response['Content-Disposition'] = (
+            'attachment; '
+            f'filename={settings.SHOP_LIST_FILE_NAME}.{renderer.format}'
         )
-        response['Content-Disposition'] = \
-            f'attachment; filename={settings.SHOP_LIST_FILE_NAME}'
         return response
 
     @action(detail=True, methods=('post', 'delete'),
@@ -170,7 +377,8 @@ class RecipeViewSet(ModelViewSet):
         )
 
 
-class IngredientViewSet(mixins.ListModelMixin,
+class IngredientViewSet(VersionETagMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         GenericViewSet):
     queryset = Ingredient.objects.all()
@@ -178,11 +386,27 @@ class IngredientViewSet(mixins.ListModelMixin,
     permission_classes = (AllowAny, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
+    etag_models = (Ingredient, )
+
+    def list(self, request, *args, **kwargs):
+        if 'name' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        serializer = IngredientSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return self.conditional_response(
+            request,
+            lambda: Response(
+                ingredient_index.search(**serializer.validated_data)
+            ),
+            self.get_version_etag(request)
+        )
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(VersionETagMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  GenericViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny, )
+    etag_models = (Tag, )
@@ -5,3 +5,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_asgi_application()
+
+from recipes.ingredient_index import ingredient_index  # noqa: E402
+from recipes.pantry_index import pantry_index  # noqa: E402
+
+ingredient_index.warm()
+pantry_index.warm()
@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import hmac
+import random
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+from foodgram.routers import read_database
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY = 'replica:sticky:{}'
+
+
+def get_sticky_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return STICKY_KEY.format(hmac.new(
+        settings.SECRET_KEY.encode(), authorization.encode(), hashlib.sha256
+    ).hexdigest())
+
+
+def is_sticky(request):
+    if settings.REPLICA_STICKY_COOKIE in request.COOKIES:
+        return True
+    key = get_sticky_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def stick_to_primary(request, response):
+    response.set_cookie(
+        settings.REPLICA_STICKY_COOKIE,
+        '1',
+        max_age=settings.REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite='Lax'
+    )
+    key = get_sticky_key(request)
+    if key is not None:
+        cache.set(key, 1, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def get_read_database(request):
+    if (not settings.DATABASE_REPLICAS
+            or request.method not in SAFE_METHODS
+            or not request.path.startswith(settings.REPLICA_READ_PREFIX)
+            or is_sticky(request)):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = read_database.set(get_read_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        if request.method not in SAFE_METHODS:
+            stick_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = read_database.set(await sync_to_async(
+            get_read_database, thread_sensitive=False
+        )(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        if request.method not in SAFE_METHODS:
+            await sync_to_async(
+                stick_to_primary, thread_sensitive=False
+            )(request, response)
+        return response
@@ -0,0 +1,102 @@
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from foodgram.postgresql.pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+POOL_CONN_MAX_AGE_MESSAGE = (
+    'С пулом соединений ({}) CONN_MAX_AGE должен быть равен 0: '
+    'соединение возвращается в пул при закрытии'
+)
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if (
+            self.settings_dict.get('POOL')
+            and self.settings_dict.get('CONN_MAX_AGE')
+        ):
+            raise ImproperlyConfigured(
+                POOL_CONN_MAX_AGE_MESSAGE.format(self.alias)
+            )
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    self.connect_new,
+                    max_size=options['MAX_SIZE'],
+                    max_idle=options['MAX_IDLE'],
+                    timeout=options['TIMEOUT'],
+                    check=(
+                        is_usable
+                        if self.settings_dict.get('CONN_HEALTH_CHECKS')
+                        else None
+                    )
+                )
+            return pools[self.alias]
+
+    def connect_new(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.acquire()
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        connection = self.connection
+        reusable = not self.in_atomic_block and not (
+            self.errors_occurred and not is_usable(connection)
+        )
+        if reusable and connection.get_transaction_status() != (
+            extensions.TRANSACTION_STATUS_IDLE
+        ):
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+        pool.release(connection, reusable)
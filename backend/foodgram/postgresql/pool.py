@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+POOL_TIMEOUT_MESSAGE = 'Нет свободных соединений с базой данных за {} с'
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size, max_idle, timeout,
+                 check=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.check = check
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def evict(self, now):
+        while self.idle and now - self.idle[0][1] > self.max_idle:
+            connection, _ = self.idle.popleft()
+            self.discard(connection)
+
+    def discard(self, connection):
+        self.size -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def take(self):
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while True:
+                self.evict(time.monotonic())
+                if self.idle:
+                    return self.idle.pop()[0]
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise OperationalError(
+                        POOL_TIMEOUT_MESSAGE.format(self.timeout)
+                    )
+                self.condition.wait(remaining)
+
+    def acquire(self):
+        while True:
+            connection = self.take()
+            if connection is None:
+                try:
+                    return self.connect()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+            if not connection.closed and (
+                self.check is None or self.check(connection)
+            ):
+                return connection
+            with self.condition:
+                self.discard(connection)
+                self.condition.notify()
+
+    def release(self, connection, reusable=True):
+        with self.condition:
+            if reusable and not connection.closed:
+                self.idle.append((connection, time.monotonic()))
+            else:
+                self.discard(connection)
+            self.evict(time.monotonic())
+            self.condition.notify()
+
+    def clear(self):
+        with self.condition:
+            while self.idle:
+                self.discard(self.idle.pop()[0])
+            self.condition.notify_all()
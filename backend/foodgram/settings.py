@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,15 +57,60 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'postgres'),
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(
+            os.getenv('DB_CONN_MAX_AGE', 60)
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'MAX_IDLE': int(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        } if DB_POOL else None,
+    }
+}
+DATABASES.update({
+    f'replica_{number}': {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
     }
+    for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+    )
+})
+DATABASE_REPLICAS = tuple(alias for alias in DATABASES if alias != 'default')
+DATABASE_ROUTERS = ['foodgram.routers.PrimaryReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/foodgram_cache'),
+    },
+    'fragments': {
+        'BACKEND': os.getenv(
+            'FRAGMENT_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', 'fragments'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', 10000))
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -103,7 +149,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.LimitedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -118,13 +169,63 @@ DJOSER = {
         'user_list': ['rest_framework.permissions.AllowAny'],
     },
     'SERIALIZERS': {
-        'user': 'djoser.serializers.UserSerializer',
-        'user_list': 'djoser.serializers.UserSerializer'
+        'user': 'api.serializers.UserSerializer',
+        'user_list': 'api.serializers.UserSerializer',
+        'current_user': 'api.serializers.UserSerializer'
     }
 }
 
 PAGE_SIZE = 6
-SHOP_LIST_FILE_NAME = 'shoplist.txt'
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 300)
+)
+PAGINATION_APPROXIMATE_COUNT = (
+    os.getenv('PAGINATION_APPROXIMATE_COUNT', 'False') == 'True'
+)
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(
+    os.getenv('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)
+)
+AUTH_TOKEN_CACHE_ALIAS = os.getenv('AUTH_TOKEN_CACHE_ALIAS', 'default')
+REPLICA_READ_PREFIX = '/api/'
+REPLICA_STICKY_COOKIE = 'primary_db'
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+ASYNC_READ_WORKERS = int(os.getenv('ASYNC_READ_WORKERS', 16))
+SHOP_LIST_FILE_NAME = 'shoplist'
+SHOP_LIST_CHUNK_SIZE = 2000
+BULK_RECIPES_MAX = 100
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_MAX_MISSING = 2
+PANTRY_MAX_RESULTS = 1000
+PANTRY_MAX_DELTA = 1000
+PANTRY_GAP_TIMEOUT = 10
+POPULARITY_HALF_LIFE = 3 * 24 * 60 * 60
+POPULARITY_FAVORITE_WEIGHT = 2.0
+POPULARITY_CART_WEIGHT = 1.0
+POPULARITY_MIN_SCORE = 0.01
+POPULARITY_BATCH_SIZE = 1000
+POPULARITY_COMMIT_LAG = int(os.getenv('POPULARITY_COMMIT_LAG', 60))
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+FEED_FANOUT_MIN_FOLLOWERS = 800
+FEED_BACKFILL_LIMIT = 100
+FEED_BATCH_SIZE = 1000
+FRAGMENT_CACHE_ALIAS = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+SEARCH_CONFIG = 'russian'
+SEARCH_MAX_TOKENS = 10
+IMAGE_VARIANTS = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+IMAGE_VARIANT_QUALITY = 82
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', 10 * 1024 * 1024))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 25000000))
+DATA_UPLOAD_MAX_MEMORY_SIZE = IMAGE_MAX_SIZE * 4 // 3 + 1024 * 1024
 USERNAME_MAX_LENGTH = 150
 FIRST_NAME_MAX_LENGTH = 150
 LAST_NAME_MAX_LENGTH = 150
@@ -0,0 +1,127 @@
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from foodgram.postgresql.base import DatabaseWrapper, pools
+from foodgram.postgresql.pool import ConnectionPool
+
+POOL = {'MAX_SIZE': 2, 'MAX_IDLE': 60, 'TIMEOUT': 1}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        return ConnectionPool(FakeConnection, **{
+            'max_size': 2, 'max_idle': 60, 'timeout': 0.05, **options
+        })
+
+    def test_released_connection_is_reused(self):
+        pool = self.make_pool()
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.size, 1)
+
+    def test_checkout_waits_for_free_connection(self):
+        pool = self.make_pool()
+        pool.acquire()
+        pool.acquire()
+        with self.assertRaises(OperationalError):
+            pool.acquire()
+
+    def test_failed_check_replaces_connection(self):
+        pool = self.make_pool(check=lambda connection: False)
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_unusable_connection_is_discarded_on_release(self):
+        pool = self.make_pool()
+        first = pool.acquire()
+        pool.release(first, reusable=False)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 0)
+
+    def test_idle_connections_expire(self):
+        pool = self.make_pool(max_idle=0)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIsNot(pool.acquire(), first)
+        self.assertTrue(first.closed)
+
+
+class PoolSettingsTests(SimpleTestCase):
+    def test_pool_requires_conn_max_age_zero(self):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'foodgram.postgresql',
+            'CONN_MAX_AGE': 60,
+            'POOL': POOL,
+        }
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper(settings_dict, 'pool-settings')
+        DatabaseWrapper({**settings_dict, 'CONN_MAX_AGE': 0}, 'pool-settings')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class PostgreSQLPoolTests(TransactionTestCase):
+    alias = 'pool-test'
+
+    def setUp(self):
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'POOL': POOL,
+        }, self.alias)
+        self.addCleanup(self.close_pool)
+
+    def close_pool(self):
+        self.wrapper.close()
+        pool = pools.pop(self.alias, None)
+        if pool is not None:
+            pool.clear()
+
+    def checkout(self):
+        self.wrapper.ensure_connection()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return self.wrapper.connection, cursor.fetchone()[0]
+
+    def test_connection_returns_to_pool(self):
+        raw, _ = self.checkout()
+        self.wrapper.close()
+        self.assertIsNone(self.wrapper.connection)
+        self.assertEqual([idle for idle, _ in self.wrapper.pool.idle], [raw])
+        self.assertIs(self.checkout()[0], raw)
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        raw, _ = self.checkout()
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.wrapper.close()
+        self.assertFalse(raw.closed)
+        self.assertEqual(raw.get_transaction_status(), 0)
+
+    def test_terminated_connection_is_replaced(self):
+        raw, pid = self.checkout()
+        self.wrapper.close()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', (pid, ))
+        replacement, new_pid = self.checkout()
+        self.assertIsNot(replacement, raw)
+        self.assertNotEqual(new_pid, pid)
+        self.assertEqual(self.wrapper.pool.size, 1)
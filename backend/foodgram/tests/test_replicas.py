@@ -0,0 +1,78 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from foodgram.middleware import ReplicaRoutingMiddleware
+from foodgram.routers import read_database
+from foodgram.tests.utils import TEST_CACHES, clear_caches
+from foodgram.versions import get_versions
+from recipes.models import Tag
+
+
+@override_settings(CACHES=TEST_CACHES, DATABASE_REPLICAS=('replica_1', ))
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.factory = RequestFactory()
+        self.routed = []
+        self.middleware = ReplicaRoutingMiddleware(self.respond)
+
+    def respond(self, request):
+        self.routed.append(read_database.get())
+        if request.path.endswith('versions/'):
+            get_versions(Tag)
+            self.routed.append(read_database.get())
+        return HttpResponse()
+
+    def request(self, method, path, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        return self.middleware(getattr(self.factory, method)(path, **headers))
+
+    def test_reads_go_to_replica(self):
+        self.request('get', '/api/recipes/')
+        self.assertEqual(self.routed, ['replica_1'])
+
+    def test_writes_and_other_paths_use_primary(self):
+        self.request('post', '/api/recipes/')
+        self.request('get', '/admin/')
+        self.assertEqual(self.routed, [None, None])
+
+    def test_writer_reads_own_writes(self):
+        response = self.request('post', '/api/recipes/', token='writer')
+        self.assertIn('primary_db', response.cookies)
+        self.request('get', '/api/recipes/', token='writer')
+        self.request('get', '/api/recipes/', token='reader')
+        self.request('get', '/api/recipes/')
+        self.assertEqual(
+            self.routed, [None, None, 'replica_1', 'replica_1']
+        )
+
+    def test_sticky_cookie_uses_primary(self):
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES['primary_db'] = '1'
+        self.middleware(request)
+        self.assertEqual(self.routed, [None])
+
+    @override_settings(DATABASE_REPLICAS=('default', ))
+    def test_versions_do_not_change_routing(self):
+        self.request('post', '/api/tags/', token='writer')
+        self.request('get', '/api/versions/', token='reader')
+        self.assertEqual(self.routed, [None, 'default', 'default'])
+
+    def test_async_chain_routes_reads(self):
+        async def respond(request):
+            self.routed.append(read_database.get())
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(respond)
+        call = async_to_sync(middleware)
+        response = call(self.factory.post(
+            '/api/recipes/', HTTP_AUTHORIZATION='Token writer'
+        ))
+        self.assertIn('primary_db', response.cookies)
+        for token in ('writer', 'reader'):
+            call(self.factory.get(
+                '/api/recipes/', HTTP_AUTHORIZATION=f'Token {token}'
+            ))
+        self.assertEqual(self.routed, [None, None, 'replica_1'])
@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from foodgram.versions import bump_versions, get_versions, increment_versions
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import CacheVersion, Ingredient, Recipe, Tag
+
+
+class VersionTests(TransactionTestCase):
+    def test_bump_waits_for_commit(self):
+        before = get_versions(Tag)[0]
+        with transaction.atomic():
+            bump_versions(Tag)
+            self.assertEqual(get_versions(Tag)[0], before)
+        self.assertEqual(get_versions(Tag)[0], before + 1)
+
+    def test_rolled_back_write_keeps_version(self):
+        before = get_versions(Tag)[0]
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                bump_versions(Tag)
+                raise ValueError
+        self.assertEqual(get_versions(Tag)[0], before)
+
+    def test_increments_are_not_lost(self):
+        before = get_versions(Recipe, Ingredient)
+        for _ in range(5):
+            increment_versions(['recipes.recipe', 'recipes.ingredient'])
+        self.assertEqual(
+            get_versions(Recipe, Ingredient),
+            tuple(version + 5 for version in before)
+        )
+
+    def test_missing_version_is_created(self):
+        CacheVersion.objects.filter(label='recipes.tag').delete()
+        self.assertEqual(get_versions(Tag), (0, ))
+        increment_versions(['recipes.tag'])
+        self.assertEqual(get_versions(Tag), (1, ))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VersionedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+
+    def create_recipe(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_recipe(self.author, name)
+
+    def test_cached_count_follows_writes(self):
+        clear_caches()
+        self.create_recipe('Первый')
+        self.assertEqual(self.client.get('/api/recipes/').data['count'], 1)
+        self.assertEqual(self.client.get('/api/recipes/').data['count'], 1)
+        recipe = self.create_recipe('Второй')
+        self.assertEqual(self.client.get('/api/recipes/').data['count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(self.client.get('/api/recipes/').data['count'], 1)
@@ -0,0 +1,32 @@
+from django.core.cache import caches
+
+from recipes.models import Recipe
+from users.models import User
+
+TEST_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'tests-{alias}',
+    }
+    for alias in ('default', 'fragments')
+}
+
+
+def clear_caches():
+    for alias in TEST_CACHES:
+        caches[alias].clear()
+
+
+def create_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.com', username=name,
+        first_name=name, last_name='Тестовый', password='pass', **fields
+    )
+
+
+def create_recipe(author, name, **fields):
+    return Recipe.objects.create(
+        author=author, name=name, text=fields.pop('text', 'Описание'),
+        cooking_time=fields.pop('cooking_time', 10),
+        image=fields.pop('image', 'recipes/images/test.png'), **fields
+    )
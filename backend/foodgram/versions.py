@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models import F
+
+from recipes.models import CacheVersion
+
+
+def get_labels(models):
+    return [model._meta.label_lower for model in models]
+
+
+def get_versions(*models):
+    labels = get_labels(models)
+    versions = dict(
+        CacheVersion.objects.filter(label__in=labels).values_list(
+            'label', 'value'
+        )
+    )
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        CacheVersion.objects.bulk_create(
+            (CacheVersion(label=label) for label in missing),
+            ignore_conflicts=True
+        )
+    return tuple(versions.get(label, 0) for label in labels)
+
+
+def increment_versions(labels):
+    versions = CacheVersion.objects.filter(label__in=labels)
+    if versions.update(value=F('value') + 1) < len(labels):
+        CacheVersion.objects.bulk_create(
+            (CacheVersion(label=label) for label in labels),
+            ignore_conflicts=True
+        )
+        versions.update(value=F('value') + 1)
+
+
+def bump_versions(*models):
+    labels = get_labels(models)
+    transaction.on_commit(lambda: increment_versions(labels))
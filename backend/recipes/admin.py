@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from recipes.images import schedule_recipe_image
+from recipes.pantry_index import record_changes
 from recipes.models import (Favorite, RecipeIngredient,
                             Ingredient, Recipe,
                             Tag, Cart)
@@ -32,12 +34,25 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'text',
         'image',
-        'favorite_count',
+        'favorites_count',
+        'in_carts_count',
         'tag',
         'cooking_time'
     )
     list_filter = ('tags', )
     search_fields = ('author__username', 'name')
+    readonly_fields = ('image_variants', )
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.image_variants = {}
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            schedule_recipe_image(obj.id)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        record_changes((form.instance.id, ))
 
     @admin.display(description='Теги')
     def tag(self, recipe):
@@ -46,10 +61,6 @@ class RecipeAdmin(admin.ModelAdmin):
             tags.append(tag.name)
         return ' ::: '.join(tags)
 
-    @admin.display(description='В избранном')
-    def favorite_count(self, obj):
-        return obj.favorites.count()
-
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
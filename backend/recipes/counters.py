@@ -0,0 +1,22 @@
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Subscribe, User
+
+COUNTERS = {
+    Favorite: (Recipe, 'favorites_count', 'recipe_id'),
+    Cart: (Recipe, 'in_carts_count', 'recipe_id'),
+    Subscribe: (User, 'followers_count', 'author_id'),
+    Recipe: (User, 'recipes_count', 'author_id'),
+}
+
+
+def change_counters(model, ids, delta):
+    ids = list(ids)
+    if not ids or not delta:
+        return
+    target, field, _ = COUNTERS[model]
+    target.objects.filter(id__in=ids).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
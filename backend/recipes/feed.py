@@ -0,0 +1,130 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe, User
+
+
+def create_entries(entries):
+    FeedEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out(recipe):
+    if not User.objects.filter(
+        id=recipe.author_id, feed_fanout=True
+    ).exists():
+        return
+    create_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe.id,
+            author_id=recipe.author_id,
+            pub_date=recipe.pub_date
+        )
+        for user_id in Subscribe.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def backfill(author_id, user_ids):
+    recipes = list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL_LIMIT])
+    create_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for user_id in user_ids
+        for recipe_id, pub_date in recipes
+    )
+
+
+def backfill_followers(author_id):
+    followers = Subscribe.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True).order_by('user_id').iterator()
+    while True:
+        user_ids = list(islice(followers, settings.FEED_BATCH_SIZE))
+        if not user_ids:
+            return
+        backfill(author_id, user_ids)
+
+
+def follow(user_id, author_id):
+    fanout, followers_count = User.objects.values_list(
+        'feed_fanout', 'followers_count'
+    ).get(id=author_id)
+    if not fanout:
+        return
+    if followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        User.objects.filter(id=author_id).update(feed_fanout=False)
+        return
+    backfill(author_id, (user_id, ))
+
+
+def unfollow(user_id, author_id):
+    FeedEntry.objects.filter(author_id=author_id, user_id=user_id).delete()
+
+
+def enable_fanout(author_id):
+    backfill_followers(author_id)
+    enabled = User.objects.filter(
+        id=author_id,
+        feed_fanout=False,
+        followers_count__lte=settings.FEED_FANOUT_MIN_FOLLOWERS
+    ).update(feed_fanout=True)
+    if enabled:
+        backfill_followers(author_id)
+    return bool(enabled)
+
+
+def get_position_filter(position, id_field):
+    if position is None:
+        return Q()
+    pub_date, recipe_id = position
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{id_field}__lt': recipe_id}
+    )
+
+
+def get_sources(user, position, limit):
+    pulled_authors = User.objects.filter(
+        following__user=user,
+        feed_fanout=False
+    ).order_by().values('id')
+    return (
+        FeedEntry.objects.filter(user=user).filter(
+            get_position_filter(position, 'recipe_id')
+        ).order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[:limit],
+        Recipe.objects.filter(author__in=pulled_authors).filter(
+            get_position_filter(position, 'id')
+        ).order_by('-pub_date', '-id').values_list('pub_date', 'id')[:limit]
+    )
+
+
+def get_feed(user, position, limit):
+    recipe_ids = []
+    seen = set()
+    for _, recipe_id in heapq.merge(
+        *get_sources(user, position, limit), reverse=True
+    ):
+        if recipe_id in seen:
+            continue
+        seen.add(recipe_id)
+        recipe_ids.append(recipe_id)
+        if len(recipe_ids) == limit:
+            break
+    return recipe_ids
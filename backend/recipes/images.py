@@ -0,0 +1,134 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from foodgram.versions import bump_versions
+from recipes.models import Recipe
+from recipes.storage import touch
+
+logger = logging.getLogger(__name__)
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    thread_name_prefix='recipe-images'
+                )
+    return executor
+
+
+def get_variant_name(image_name, variant, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return (
+        f'{settings.IMAGE_VARIANTS_DIR}/{stem}_{variant}.{extension}'
+    )
+
+
+def render_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    buffer = io.BytesIO()
+    variant.save(
+        buffer,
+        image_format,
+        quality=settings.IMAGE_VARIANT_QUALITY,
+        optimize=True
+    )
+    return buffer.getvalue()
+
+
+def build_variants(image_name):
+    storage = Recipe._meta.get_field('image').storage
+    with storage.open(image_name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    variants = {}
+    for variant, size in settings.IMAGE_VARIANTS.items():
+        variants[variant] = {}
+        for extension, image_format in settings.IMAGE_VARIANT_FORMATS.items():
+            name = get_variant_name(image_name, variant, extension)
+            if not touch(default_storage, name):
+                name = default_storage.save(name, ContentFile(
+                    render_variant(image, size, image_format)
+                ))
+            variants[variant][extension] = name
+    return variants
+
+
+def process_recipe_image(recipe_id):
+    image_name = Recipe.objects.filter(
+        id=recipe_id
+    ).values_list('image', flat=True).first()
+    if not image_name:
+        return False
+    variants = build_variants(image_name)
+    updated = Recipe.objects.filter(
+        id=recipe_id,
+        image=image_name
+    ).update(image_variants=variants, modified=timezone.now())
+    if updated:
+        bump_versions(Recipe)
+    return bool(updated)
+
+
+def run_in_worker(recipe_id):
+    close_old_connections()
+    try:
+        return process_recipe_image(recipe_id)
+    finally:
+        connection.close()
+
+
+def report_failure(recipe_id, future):
+    if future.cancelled():
+        logger.error('Обработка изображения рецепта %s отменена', recipe_id)
+    elif future.exception() is not None:
+        logger.error(
+            'Не удалось построить копии изображения рецепта %s',
+            recipe_id, exc_info=future.exception()
+        )
+
+
+def submit_recipe_image(recipe_id):
+    future = get_executor().submit(run_in_worker, recipe_id)
+    future.add_done_callback(partial(report_failure, recipe_id))
+    return future
+
+
+def schedule_recipe_image(recipe_id):
+    transaction.on_commit(partial(submit_recipe_image, recipe_id))
+
+
+def get_variant_urls(recipe):
+    if not recipe.image:
+        return {}
+    variants = recipe.image_variants or {}
+    return {
+        variant: {
+            extension: default_storage.url(
+                variants.get(variant, {}).get(extension, recipe.image.name)
+            )
+            for extension in settings.IMAGE_VARIANT_FORMATS
+        }
+        for variant in settings.IMAGE_VARIANTS
+    }
@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.db.transaction import atomic
+
+from recipes.models import Ingredient, Tag
+
+IMPORT_FIELDS = {
+    Ingredient: ('name', 'measurement_unit'),
+    Tag: ('name', 'slug', 'color'),
+}
+IMPORT_KEYS = {
+    Ingredient: ('name', 'measurement_unit'),
+    Tag: ('slug', ),
+}
+FORMATS = {'.json': 'json', '.jsonl': 'jsonl', '.csv': 'csv'}
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def get_format(path, file_format=None):
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Неизвестный формат файла: {path}')
+    return FORMATS[extension]
+
+
+def iter_json_array(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = finished = False
+    for chunk in iter(lambda: file.read(JSON_CHUNK_SIZE), ''):
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Ожидается JSON-массив')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                finished = True
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item
+            position = end
+        if finished:
+            return
+    if buffer[position:].strip():
+        json.loads(buffer[position:])
+    if not finished:
+        raise ValueError('Незавершённый JSON-массив')
+
+
+def iter_chunks(file, file_format, batch_size):
+    lines = []
+    quotes = 0
+    for line in file:
+        lines.append(line)
+        if file_format == 'csv':
+            quotes += line.count('"')
+        if len(lines) >= batch_size and quotes % 2 == 0:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def parse_lines(file_format, fields, lines):
+    if file_format == 'csv':
+        return [
+            dict(zip(fields, values))
+            for values in csv.reader(lines) if values
+        ]
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def clean_row(fields, row):
+    missing = [field for field in fields if not row.get(field)]
+    if missing:
+        raise ValueError(f'Не заполнены поля {", ".join(missing)}: {row}')
+    return tuple(str(row[field]).strip() for field in fields)
+
+
+def iter_batches(path, fields, batch_size, file_format=None, workers=0):
+    file_format = get_format(path, file_format)
+    with open(path, encoding='utf-8', newline='') as file:
+        if file_format == 'json':
+            rows = iter_json_array(file)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    return
+                yield batch
+        chunks = iter_chunks(file, file_format, batch_size)
+        if workers <= 1:
+            for lines in chunks:
+                yield parse_lines(file_format, fields, lines)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for lines in chunks:
+                pending.append(executor.submit(
+                    parse_lines, file_format, fields, lines
+                ))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def get_existing(model, fields, keys, rows):
+    existing = {}
+    for values in model.objects.filter(
+        **{f'{keys[0]}__in': {row[keys[0]] for row in rows.values()}}
+    ).values_list('id', *fields).iterator():
+        row = dict(zip(fields, values[1:]))
+        existing[tuple(row[key] for key in keys)] = values[0], row
+    return existing
+
+
+@atomic
+def import_batch(model, batch, update=False):
+    fields = IMPORT_FIELDS[model]
+    keys = IMPORT_KEYS[model]
+    rows = {}
+    for row in batch:
+        row = dict(zip(fields, clean_row(fields, row)))
+        rows[tuple(row[key] for key in keys)] = row
+    existing = get_existing(model, fields, keys, rows)
+    created = [
+        model(**row) for key, row in rows.items() if key not in existing
+    ]
+    changed = [
+        model(id=existing[key][0], **row) for key, row in rows.items()
+        if update and key in existing and existing[key][1] != row
+    ]
+    inserted = 0
+    if created:
+        model.objects.bulk_create(created, ignore_conflicts=True)
+        stored = get_existing(model, fields, keys, rows)
+        inserted = sum(key in stored and key not in existing for key in rows)
+    model.objects.bulk_update(changed, fields)
+    return inserted, len(changed)
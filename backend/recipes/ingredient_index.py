@@ -0,0 +1,67 @@
+import bisect
+import threading
+
+from django.db import DatabaseError
+
+from foodgram.versions import get_versions
+from recipes.models import Ingredient
+
+MAX_CHAR = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.entries = ([], [])
+
+    def load(self, rows):
+        entries = sorted(
+            (name.casefold(), name, measurement_unit, pk)
+            for pk, name, measurement_unit in rows
+        )
+        self.entries = (
+            [key for key, *_ in entries],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+                for _, name, measurement_unit, pk in entries
+            ]
+        )
+
+    def refresh(self):
+        version = get_versions(Ingredient)
+        if version == self.version:
+            return
+        with self.lock:
+            if version != self.version:
+                self.load(Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ))
+                self.version = version
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+
+    def search(self, name, limit=None, contains=False):
+        self.refresh()
+        keys, rows = self.entries
+        needle = name.casefold()
+        start = bisect.bisect_left(keys, needle)
+        end = bisect.bisect_right(keys, needle + MAX_CHAR, lo=start)
+        found = rows[start:end]
+        if contains and (limit is None or len(found) < limit):
+            matches = sorted(
+                (position, index)
+                for index, position in enumerate(
+                    key.find(needle) for key in keys
+                )
+                if position > 0
+            )
+            found += [rows[index] for _, index in matches]
+        return found[:limit]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.feed import enable_fanout
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Перевод авторов, у которых стало меньше подписчиков, '
+        'на рассылку рецептов в ленты с заполнением лент подписчиков'
+    )
+
+    def handle(self, *args, **options):
+        enabled = 0
+        for author_id in User.objects.filter(
+            feed_fanout=False,
+            followers_count__lte=settings.FEED_FANOUT_MIN_FOLLOWERS
+        ).values_list('id', flat=True).order_by('id'):
+            enabled += enable_fanout(author_id)
+        self.stdout.write(f'Авторов переведено на рассылку: {enabled}')
@@ -0,0 +1,471 @@
+import asyncio
+import io
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.db.transaction import atomic, set_rollback
+from django.test.utils import override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from foodgram.postgresql.base import pools
+from recipes.feed import get_feed
+from recipes.ingredient_index import ingredient_index
+from recipes.models import FeedEntry, Ingredient, Recipe, Tag
+from recipes.pantry_index import PantryIndex
+from users.models import Subscribe, User
+
+PANTRY_INGREDIENTS = 2000
+PANTRY_SIZE = (3, 15)
+PANTRY_QUERY_SIZE = (5, 30)
+PANTRY_SCAN_REPEAT = 20
+FEED_AUTHORS = 2000
+FEED_RECIPES_PER_AUTHOR = 50
+FEED_LARGE_AUTHORS = 0.01
+FEED_FOLLOWS = (10, 100, 500, 2000)
+FEED_REPEAT = 50
+FEED_PAGE_SIZE = 6
+ASGI_PATHS = (
+    ('/api/tags/', ''),
+    ('/api/ingredients/', 'name={prefix}'),
+    ('/api/recipes/', ''),
+    ('/api/recipes/', 'tags={tag}'),
+    ('/api/recipes/{recipe}/', ''),
+)
+
+
+class SyncURLConf:
+    @property
+    def urlpatterns(self):
+        from api.urls import router
+        return [path('api/', include(router.urls))]
+
+
+class AsyncURLConf:
+    @property
+    def urlpatterns(self):
+        from api.async_views import urlpatterns
+        from api.urls import router
+        return [path('api/', include(urlpatterns + router.urls))]
+
+
+class Command(BaseCommand):
+    help = 'Сравнение производительности оптимизированных путей'
+    targets = ('ingredients', 'pantry', 'feed', 'asgi', 'connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=self.targets)
+        parser.add_argument('--repeat', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASYNC_READ_WORKERS,
+            help=(
+                'Потоков в процессе: gunicorn --threads для WSGI '
+                'и ASYNC_READ_WORKERS для ASGI'
+            )
+        )
+        parser.add_argument(
+            '--cores', type=int, default=1,
+            help='Число ядер, к которым привязывается процесс'
+        )
+        parser.add_argument(
+            '--db-latency', type=float, default=2.0,
+            help='Искусственная задержка каждого SQL-запроса, мс'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.options = options
+        getattr(self, f'benchmark_{options["target"]}')(options['repeat'])
+
+    def measure(self, label, func, arguments):
+        timings = []
+        for argument in arguments:
+            start = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.stdout.write(
+            f'{label}: среднее {statistics.mean(timings) * 1e6:.1f} мкс, '
+            f'p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} мкс'
+        )
+
+    def benchmark_ingredients(self, repeat):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            self.stderr.write('Нет ингредиентов, выполните import_json')
+            return
+        prefixes = [
+            name[:self.random.randint(1, 3)]
+            for name in self.random.choices(names, k=repeat)
+        ]
+        ingredient_index.refresh()
+        self.measure(
+            'ORM name__istartswith',
+            lambda prefix: list(Ingredient.objects.filter(
+                name__istartswith=prefix
+            ).values('id', 'name', 'measurement_unit')),
+            prefixes
+        )
+        self.measure('Префиксный индекс', ingredient_index.search, prefixes)
+        self.measure(
+            'Префиксный индекс, limit=10, contains',
+            lambda prefix: ingredient_index.search(
+                prefix, limit=10, contains=True
+            ),
+            prefixes
+        )
+
+    def benchmark_pantry(self, repeat):
+        ingredients = range(1, PANTRY_INGREDIENTS + 1)
+        weights = [1 / ingredient_id for ingredient_id in ingredients]
+        recipes = {
+            recipe_id: set(self.random.choices(
+                ingredients, weights, k=self.random.randint(*PANTRY_SIZE)
+            ))
+            for recipe_id in range(1, self.options['recipes'] + 1)
+        }
+        rows = [
+            (recipe_id, ingredient_id)
+            for recipe_id, recipe_ingredients in recipes.items()
+            for ingredient_id in recipe_ingredients
+        ]
+        pantries = [
+            set(self.random.choices(
+                ingredients, weights,
+                k=self.random.randint(*PANTRY_QUERY_SIZE)
+            ))
+            for _ in range(repeat)
+        ]
+        index = PantryIndex()
+        start = time.perf_counter()
+        index.load(rows)
+        self.stdout.write(
+            f'Рецептов: {len(recipes)}, связей: {len(rows)}, '
+            f'построение индекса {time.perf_counter() - start:.2f} с'
+        )
+        self.measure(
+            'Полный перебор рецептов',
+            lambda pantry: sorted(
+                (len(needed - pantry), recipe_id)
+                for recipe_id, needed in recipes.items()
+                if len(needed - pantry) <= settings.PANTRY_MAX_MISSING
+            )[:settings.PANTRY_MAX_RESULTS],
+            pantries[:PANTRY_SCAN_REPEAT]
+        )
+        self.measure(
+            'Инвертированный индекс',
+            lambda pantry: index.rank(
+                pantry,
+                settings.PANTRY_MAX_MISSING,
+                settings.PANTRY_MAX_RESULTS
+            ),
+            pantries
+        )
+
+    def create_feed_data(self):
+        now = timezone.now()
+        User.objects.bulk_create(
+            User(
+                username=f'benchmark-feed-{index}',
+                email=f'benchmark-feed-{index}@example.com',
+                first_name='Benchmark',
+                last_name='Feed'
+            )
+            for index in range(FEED_AUTHORS)
+        )
+        authors = list(User.objects.filter(
+            username__startswith='benchmark-feed-'
+        ))
+        large = set(self.random.sample(
+            [author.id for author in authors],
+            int(FEED_AUTHORS * FEED_LARGE_AUTHORS)
+        ))
+        User.objects.filter(id__in=large).update(
+            followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS + 1,
+            feed_fanout=False
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name='Benchmark',
+                    text='Benchmark',
+                    image='recipes/benchmark.png',
+                    author=author
+                )
+                for author in authors
+                for _ in range(FEED_RECIPES_PER_AUTHOR)
+            ),
+            batch_size=settings.FEED_BATCH_SIZE
+        )
+        recipes = list(Recipe.objects.filter(author__in=authors).only('id'))
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                minutes=self.random.randint(0, 60 * 24 * 365)
+            )
+        Recipe.objects.bulk_update(
+            recipes, ('pub_date', ), batch_size=settings.FEED_BATCH_SIZE
+        )
+        readers = []
+        for follows in FEED_FOLLOWS:
+            reader = User.objects.create(
+                username=f'benchmark-reader-{follows}',
+                email=f'benchmark-reader-{follows}@example.com'
+            )
+            followed = self.random.sample(authors, min(follows, len(authors)))
+            Subscribe.objects.bulk_create(
+                Subscribe(user=reader, author=author) for author in followed
+            )
+            pushed = Recipe.objects.filter(author__in=[
+                author for author in followed if author.id not in large
+            ]).values_list('id', 'author_id', 'pub_date')
+            FeedEntry.objects.bulk_create(
+                (
+                    FeedEntry(
+                        user=reader,
+                        recipe_id=recipe_id,
+                        author_id=author_id,
+                        pub_date=pub_date
+                    )
+                    for recipe_id, author_id, pub_date in pushed
+                ),
+                batch_size=settings.FEED_BATCH_SIZE
+            )
+            readers.append((len(followed), reader))
+        return readers
+
+    @atomic
+    def benchmark_feed(self, repeat):
+        readers = self.create_feed_data()
+        repeat = min(repeat, FEED_REPEAT)
+        for follows, reader in readers:
+            self.stdout.write(f'Подписок: {follows}')
+            self.measure(
+                '  author__following__user + order_by',
+                lambda user: list(Recipe.objects.filter(
+                    author__following__user=user
+                ).order_by('-pub_date', '-id').values_list(
+                    'id', flat=True
+                )[:FEED_PAGE_SIZE]),
+                [reader] * repeat
+            )
+            self.measure(
+                '  Лента: fan-out + pull',
+                lambda user: get_feed(user, None, FEED_PAGE_SIZE),
+                [reader] * repeat
+            )
+        set_rollback(True)
+
+    def report(self, label, timings, elapsed, errors):
+        timings.sort()
+        self.stdout.write(
+            f'{label}: {len(timings) / elapsed:.1f} запросов/с, '
+            f'среднее {statistics.mean(timings) * 1e3:.1f} мс, '
+            f'p99 {timings[int(len(timings) * 0.99)] * 1e3:.1f} мс, '
+            f'ошибок {errors}'
+        )
+
+    def get_asgi_requests(self, repeat):
+        recipes = list(Recipe.objects.values_list('id', flat=True)[:100])
+        tags = list(Tag.objects.filter(
+            recipe__isnull=False
+        ).distinct().values_list('slug', flat=True))
+        names = list(Ingredient.objects.values_list('name', flat=True)[:100])
+        if not (recipes and tags and names):
+            return None
+        return [
+            (
+                url.format(recipe=self.random.choice(recipes)),
+                query.format(
+                    tag=quote(self.random.choice(tags)),
+                    prefix=quote(self.random.choice(names)[:2])
+                )
+            )
+            for url, query in self.random.choices(ASGI_PATHS, k=repeat)
+        ]
+
+    def delay_query(self, execute, sql, params, many, context):
+        time.sleep(self.options['db_latency'] / 1000)
+        return execute(sql, params, many, context)
+
+    def add_db_latency(self, sender, connection, **kwargs):
+        if self.delay_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self.delay_query)
+
+    def wsgi_request(self, application, url, query=''):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': url,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        statuses = []
+        start = time.perf_counter()
+        response = application(
+            environ, lambda status, headers: statuses.append(status)
+        )
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - start, statuses[0][:3] != '200'
+
+    def run_wsgi(self, requests, threads):
+        application = get_wsgi_application()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(
+                lambda request: self.wsgi_request(application, *request),
+                requests
+            ))
+        return results, time.perf_counter() - start
+
+    def run_asgi(self, requests, threads):
+        application = get_asgi_application()
+
+        async def call(request, semaphore):
+            url, query = request
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': url,
+                'root_path': '',
+                'query_string': query.encode(),
+                'headers': [(b'host', b'testserver')],
+                'server': ('testserver', 80),
+            }
+            statuses = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - start, statuses[0] != 200
+
+        async def run():
+            semaphore = asyncio.Semaphore(threads)
+            return await asyncio.gather(
+                *(call(request, semaphore) for request in requests)
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        return results, time.perf_counter() - start
+
+    def pin_cores(self):
+        cores = sorted(os.sched_getaffinity(0))[:self.options['cores']]
+        os.sched_setaffinity(0, cores)
+        return len(cores)
+
+    def benchmark_asgi(self, repeat):
+        requests = self.get_asgi_requests(repeat)
+        if requests is None:
+            self.stderr.write('Нет рецептов, тегов или ингредиентов')
+            return
+        threads = self.options['threads']
+        affinity = os.sched_getaffinity(0)
+        cores = self.pin_cores()
+        self.stdout.write(
+            f'Запросов: {len(requests)}, процесс 1, ядер {cores}, '
+            f'задержка БД {self.options["db_latency"]} мс на запрос'
+        )
+        connections.close_all()
+        connection_created.connect(self.add_db_latency)
+        try:
+            for label, urlconf, run, run_threads in (
+                (
+                    'WSGI, sync: 1 поток',
+                    SyncURLConf(), self.run_wsgi, 1
+                ),
+                (
+                    f'WSGI, gthread: gunicorn --threads {threads}',
+                    SyncURLConf(), self.run_wsgi, threads
+                ),
+                (
+                    f'ASGI, пул потоков ASYNC_READ_WORKERS={threads}',
+                    AsyncURLConf(), self.run_asgi, threads
+                ),
+            ):
+                with override_settings(
+                    ROOT_URLCONF=urlconf, ASYNC_READ_WORKERS=threads
+                ):
+                    results, elapsed = run(requests, run_threads)
+                self.report(
+                    label,
+                    [timing for timing, _ in results],
+                    elapsed,
+                    sum(error for _, error in results)
+                )
+        finally:
+            connection_created.disconnect(self.add_db_latency)
+            connections.close_all()
+            os.sched_setaffinity(0, affinity)
+
+    def benchmark_connections(self, repeat):
+        application = get_wsgi_application()
+        settings_dict = connection.settings_dict
+        original = {
+            key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'POOL')
+        }
+        modes = [
+            ('Новое соединение на каждый запрос', 0, None),
+            ('Постоянные соединения', None, None),
+        ]
+        if hasattr(connection, 'pool'):
+            modes.append(('Пул соединений', 0, {
+                'MAX_SIZE': 1, 'MAX_IDLE': 60, 'TIMEOUT': 10
+            }))
+        else:
+            self.stdout.write(
+                f'Пул недоступен для {connection.vendor}, '
+                'используйте ENGINE foodgram.postgresql'
+            )
+
+        def reconnect(_):
+            connection.close()
+            connection.ensure_connection()
+
+        try:
+            settings_dict['CONN_MAX_AGE'] = 0
+            settings_dict['POOL'] = None
+            self.measure('Установка соединения', reconnect, range(repeat))
+            for label, max_age, pool in modes:
+                connection.close()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                settings_dict['POOL'] = pool
+                self.measure(
+                    f'{label}, GET /api/tags/',
+                    lambda _: self.wsgi_request(application, '/api/tags/'),
+                    range(repeat)
+                )
+        finally:
+            connection.close()
+            settings_dict.update(original)
+            pool = pools.pop(connection.alias, None)
+            if pool is not None:
+                pool.clear()
@@ -0,0 +1,67 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов изображений, на которые не ссылаются рецепты'
+    directories = ('recipes', 'media', 'variants')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Не удалять файлы моложе указанного числа секунд'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены'
+        )
+
+    def get_references(self):
+        references = Counter()
+        for image, variants in Recipe.objects.values_list(
+            'image', 'image_variants'
+        ).iterator():
+            references[image] += 1
+            for formats in (variants or {}).values():
+                references.update(formats.values())
+        return references
+
+    def is_referenced(self, name):
+        lookups = Q(image=name)
+        for variant in settings.IMAGE_VARIANTS:
+            for extension in settings.IMAGE_VARIANT_FORMATS:
+                lookups |= Q(**{
+                    f'image_variants__{variant}__{extension}': name
+                })
+        return Recipe.objects.filter(lookups).exists()
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        references = self.get_references()
+        threshold = time.time() - options['min_age']
+        removed = kept = 0
+        for directory in self.directories:
+            for name in storage.walk(directory):
+                if references[name] or self.is_referenced(name):
+                    kept += 1
+                    continue
+                if storage.get_modified_time(name).timestamp() > threshold:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    storage.delete(name)
+                removed += 1
+        self.stdout.write(
+            f'Используется файлов: {kept}, '
+            f'{"к удалению" if options["dry_run"] else "удалено"}: {removed}'
+        )
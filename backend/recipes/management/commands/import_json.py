@@ -1,21 +1,94 @@
-import json
+import time
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from foodgram.versions import bump_versions
+from recipes.importers import (FORMATS, IMPORT_FIELDS, import_batch,
+                               iter_batches)
 from recipes.models import Ingredient, Tag
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
-        with open(f'{settings.BASE_DIR}/data/ingredients.json', 'r') as file:
-            ingredients = json.loads(file.read())
-            Ingredient.objects.bulk_create(
-                Ingredient(**i) for i in ingredients)
+    help = (
+        'Загрузка ингредиентов и тегов из файлов JSON, JSONL или CSV. '
+        'Уже загруженные записи пропускаются, поэтому повторный запуск '
+        'ничего не меняет'
+    )
 
-        with open(f'{settings.BASE_DIR}/data/tags.json', 'r') as file:
-            tags = json.loads(file.read())
-            Tag.objects.bulk_create(
-                Tag(**t) for t in tags)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=f'{settings.BASE_DIR}/data/ingredients.json',
+            help='Файл с ингредиентами'
+        )
+        parser.add_argument(
+            '--tags',
+            default=f'{settings.BASE_DIR}/data/tags.json',
+            help='Файл с тегами; пустая строка, чтобы не загружать теги'
+        )
+        parser.add_argument(
+            '--ingredients-format',
+            choices=sorted(set(FORMATS.values())),
+            help='Формат файла ингредиентов; по умолчанию по расширению'
+        )
+        parser.add_argument(
+            '--tags-format',
+            choices=sorted(set(FORMATS.values())),
+            help='Формат файла тегов; по умолчанию по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Обновлять изменившиеся записи вместо пропуска'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Число процессов для разбора JSONL и CSV'
+        )
 
-        self.stdout.write('Ингредиенты и теги загружены')
+    def import_file(self, model, path, file_format, options):
+        label = model._meta.verbose_name_plural
+        total = created = updated = 0
+        started = time.perf_counter()
+        try:
+            for batch in iter_batches(
+                path, IMPORT_FIELDS[model], options['batch_size'],
+                file_format, options['workers']
+            ):
+                batch_created, batch_updated = import_batch(
+                    model, batch, options['update']
+                )
+                total += len(batch)
+                created += batch_created
+                updated += batch_updated
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{label}: обработано {total}, добавлено {created}, '
+                    f'обновлено {updated}, '
+                    f'{total / elapsed if elapsed else 0:.0f} строк/с'
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(f'{path}: {error}')
+        if created or updated:
+            bump_versions(model)
+        return created + updated
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть положительным')
+        changed = self.import_file(
+            Ingredient, options['ingredients'],
+            options['ingredients_format'], options
+        )
+        if options['tags']:
+            changed += self.import_file(
+                Tag, options['tags'], options['tags_format'], options
+            )
+        self.stdout.write(
+            'Ингредиенты и теги загружены' if changed
+            else 'Новых ингредиентов и тегов нет'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.search import get_search_vector, is_postgresql
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт поисковых векторов рецептов'
+
+    def handle(self, *args, **options):
+        if not is_postgresql('default'):
+            raise CommandError('Полнотекстовый поиск требует PostgreSQL')
+        updated = Recipe.objects.update(search_vector=get_search_vector())
+        self.stdout.write(f'Поисковые векторы пересчитаны: {updated}')
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+from django.db.transaction import atomic
+
+from recipes.models import Recipe
+from users.models import User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', 'favorites'),
+    (Recipe, 'in_carts_count', 'shopping_carts'),
+    (User, 'recipes_count', 'recipes'),
+    (User, 'followers_count', 'following'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление счётчиков рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить счётчики, не изменяя их'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def get_mismatches(self, model, field, relation):
+        return list(model.objects.annotate(
+            actual=Count(relation, distinct=True)
+        ).exclude(**{field: F('actual')}).only('id', field).order_by('id'))
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field, relation in COUNTERS:
+            with atomic():
+                mismatches = self.get_mismatches(model, field, relation)
+                for obj in mismatches:
+                    self.stdout.write(
+                        f'{model._meta.verbose_name} {obj.id}, {field}: '
+                        f'сохранено {getattr(obj, field)}, '
+                        f'фактически {obj.actual}'
+                    )
+                    setattr(obj, field, obj.actual)
+                if mismatches and not options['verify']:
+                    model.objects.bulk_update(
+                        mismatches, (field, ),
+                        batch_size=options['batch_size']
+                    )
+            total += len(mismatches)
+        if options['verify'] and total:
+            raise CommandError(f'Расхождений: {total}')
+        self.stdout.write(
+            f'Счётчики исправлены: {total}' if total
+            else 'Счётчики согласованы'
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from recipes.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт рейтинга популярных рецептов. По умолчанию учитываются '
+        'только добавления с прошлого пересчёта; удаления из избранного '
+        'и корзин учитываются при полном пересчёте. Добавления моложе '
+        'POPULARITY_COMMIT_LAG секунд откладываются до следующего '
+        'пересчёта, чтобы не пропустить поздно закоммиченные записи'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рейтинг по всем добавлениям'
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_popularity(full=options['full'])
+        self.stdout.write(
+            f'{"Полный" if result["full"] else "Инкрементальный"} пересчёт: '
+            f'рецептов с новыми добавлениями {result["scored"]}, '
+            f'добавлено в рейтинг {result["added"]}, '
+            f'удалено {result["removed"]}, '
+            f'изменено мест {result["moved"]}'
+        )
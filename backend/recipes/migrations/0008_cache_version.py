@@ -0,0 +1,37 @@
+# Generated by Django 3.2.3 on 2026-10-17 08:01
+
+from django.db import migrations, models
+
+LABELS = (
+    'recipes.cart', 'recipes.favorite', 'recipes.ingredient',
+    'recipes.recipe', 'recipes.recipepopularity', 'recipes.tag',
+)
+
+
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('recipes', 'CacheVersion')
+    CacheVersion.objects.using(schema_editor.connection.alias).bulk_create(
+        CacheVersion(label=label) for label in LABELS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_pantry_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('label', models.CharField(help_text='Модель, от которой зависят кэши', max_length=100, primary_key=True, serialize=False, verbose_name='Модель')),
+                ('value', models.PositiveBigIntegerField(default=0, help_text='Растёт при каждом изменении модели', verbose_name='Поколение')),
+            ],
+            options={
+                'verbose_name': 'Поколение кэша',
+                'verbose_name_plural': 'Поколения кэшей',
+            },
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
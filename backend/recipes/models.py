@@ -1,10 +1,14 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
 from colorfield.fields import ColorField
 
-from users.models import User
+from recipes.storage import ContentAddressedStorage
+from users.models import Subscribe, User
 
 
 class Ingredient(models.Model):
@@ -64,6 +68,58 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            false = models.Value(False, output_field=models.BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                is_author_subscribed=false
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(Cart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_author_subscribed=models.Exists(Subscribe.objects.filter(
+                user=user, author=models.OuterRef('author')
+            ))
+        )
+
+    def limited_per_author(self, limit):
+        ranked = self.annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(models.F('pub_date').desc(), models.F('id').desc())
+            )
+        ).values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(id__in=RawSQL(
+            f'SELECT "id" FROM ({sql}) AS "ranked" WHERE "row_number" <= %s',
+            (*params, limit)
+        ))
+
+    def for_representation(self, prefetch=True):
+        queryset = self.defer('search_vector').select_related('author')
+        if prefetch:
+            return queryset.prefetch_related(*get_representation_prefetches())
+        return queryset
+
+
+def get_representation_prefetches():
+    return (
+        'tags',
+        models.Prefetch(
+            'recipes',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        )
+    )
+
+
 class Recipe(models.Model):
     name = models.CharField(
         max_length=settings.RECIPE_NAME_MAX_LENGTH,
@@ -74,6 +130,7 @@ class Recipe(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='recipes',
+        db_index=False,
         verbose_name='Автор',
         help_text='Имя автора'
     )
@@ -83,14 +140,26 @@ class Recipe(models.Model):
         help_text='Теги'
     )
     image = models.ImageField(
-        upload_to='media',
+        upload_to='recipes',
+        storage=ContentAddressedStorage(),
         verbose_name='Изображение',
         help_text='Изображение'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Варианты изображения',
+        help_text='Уменьшенные копии изображения'
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Описание'
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления',
         help_text='Время приготовления',
@@ -115,16 +184,45 @@ class Recipe(models.Model):
         related_name='recipe',
     )
 
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+        help_text='Сколько раз рецепт добавлен в избранное'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В корзинах',
+        help_text='Сколько раз рецепт добавлен в корзину'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         help_text='Дата публикации',
         auto_now_add=True
     )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        help_text='Дата изменения',
+        auto_now=True
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.name}, {self.author}'
@@ -145,6 +243,12 @@ class Favorite(models.Model):
         help_text='Рецепт',
         related_name='favorites'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления',
+        help_text='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -187,10 +291,19 @@ class RecipeIngredient(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='recipes',
+        db_index=False,
         verbose_name='Рецепт',
         help_text='Рецепт',
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_recipe_ingredient'
+            ),
+        )
+
     def __str__(self):
         return f'{self.recipe} ::: {self.ingredient} ::: {self.amount}'
 
@@ -210,6 +323,12 @@ class Cart(models.Model):
         related_name='shopping_carts',
         help_text='Рецепт',
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления',
+        help_text='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Корзина'
@@ -223,3 +342,162 @@ class Cart(models.Model):
 
     def __str__(self):
         return f'{self.user} ::: {self.recipe}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        db_index=False,
+        verbose_name='Подписчик',
+        help_text='Владелец ленты',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+        help_text='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+        verbose_name='Автор',
+        help_text='Автор рецепта',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        help_text='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'user'),
+                name='feed_author_user_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} ::: {self.recipe}'
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        verbose_name='Рецепт',
+        help_text='Рецепт',
+    )
+    score = models.FloatField(
+        verbose_name='Популярность',
+        help_text='Взвешенное число добавлений с затуханием',
+    )
+    rank = models.PositiveIntegerField(
+        verbose_name='Место',
+        help_text='Место в рейтинге популярности',
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата пересчёта',
+        help_text='Момент, к которому приведён рейтинг',
+    )
+
+    class Meta:
+        ordering = ('rank', 'recipe')
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        indexes = (
+            models.Index(
+                fields=('rank', 'recipe'),
+                name='recipe_popularity_rank_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.rank}. {self.recipe_id} ::: {self.score:.3f}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+        help_text='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+        related_name='shopping_list_items',
+        help_text='Ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+        help_text='Суммарное количество ингредиента',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} ::: {self.ingredient} ::: {self.amount}'
+
+
+class PantryChange(models.Model):
+    recipe_id = models.BigIntegerField(
+        verbose_name='Рецепт',
+        help_text='Рецепт, у которого изменился состав',
+    )
+
+    class Meta:
+        verbose_name = 'Изменение состава рецепта'
+        verbose_name_plural = 'Журнал изменений составов'
+
+    def __str__(self):
+        return f'{self.id} ::: {self.recipe_id}'
+
+
+class CacheVersion(models.Model):
+    label = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name='Модель',
+        help_text='Модель, от которой зависят кэши',
+    )
+    value = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Поколение',
+        help_text='Растёт при каждом изменении модели',
+    )
+
+    class Meta:
+        verbose_name = 'Поколение кэша'
+        verbose_name_plural = 'Поколения кэшей'
+
+    def __str__(self):
+        return f'{self.label} ::: {self.value}'
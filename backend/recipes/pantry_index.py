@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max, Q
+
+from recipes.models import PantryChange, RecipeIngredient
+
+
+def record_changes(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+
+    def record():
+        for recipe_id in recipe_ids:
+            change = PantryChange.objects.create(recipe_id=recipe_id)
+        PantryChange.objects.filter(
+            id__lte=change.id - settings.PANTRY_MAX_DELTA
+        ).delete()
+
+    transaction.on_commit(record)
+
+
+def get_last_change():
+    return PantryChange.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def to_bitmap(positions, length):
+    bits = bytearray((length + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class PantrySnapshot:
+    def __init__(self, recipes, recipe_ids, positions, bitmaps, size_bitmaps):
+        self.recipes = recipes
+        self.recipe_ids = recipe_ids
+        self.positions = positions
+        self.bitmaps = bitmaps
+        self.size_bitmaps = size_bitmaps
+
+
+class PantryIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.applied = None
+        self.gaps = {}
+        self.snapshot = PantrySnapshot({}, (), {}, {}, {})
+
+    def load(self, rows):
+        recipes = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            recipes[recipe_id].append(ingredient_id)
+        recipe_ids = sorted(recipes)
+        postings = defaultdict(list)
+        sizes = defaultdict(list)
+        for position, recipe_id in enumerate(recipe_ids):
+            sizes[len(recipes[recipe_id])].append(position)
+            for ingredient_id in recipes[recipe_id]:
+                postings[ingredient_id].append(position)
+        length = len(recipe_ids)
+        self.snapshot = PantrySnapshot(
+            {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipes.items()
+            },
+            tuple(recipe_ids),
+            {
+                recipe_id: position
+                for position, recipe_id in enumerate(recipe_ids)
+            },
+            {
+                ingredient_id: to_bitmap(positions, length)
+                for ingredient_id, positions in postings.items()
+            },
+            {
+                size: to_bitmap(positions, length)
+                for size, positions in sizes.items()
+            }
+        )
+
+    def set_bit(self, bitmaps, key, position, value):
+        bitmap = bitmaps.get(key, 0)
+        if value:
+            bitmap |= 1 << position
+        else:
+            bitmap &= ~(1 << position)
+        if bitmap:
+            bitmaps[key] = bitmap
+        else:
+            bitmaps.pop(key, None)
+
+    def apply(self, recipe_ids):
+        current = defaultdict(list)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].append(ingredient_id)
+        snapshot = self.snapshot
+        recipes = dict(snapshot.recipes)
+        ordered_ids = list(snapshot.recipe_ids)
+        positions = dict(snapshot.positions)
+        bitmaps = dict(snapshot.bitmaps)
+        size_bitmaps = dict(snapshot.size_bitmaps)
+        for recipe_id in sorted(recipe_ids):
+            old = recipes.get(recipe_id, ())
+            new = tuple(current.get(recipe_id, ()))
+            position = positions.get(recipe_id)
+            if position is None:
+                if not new:
+                    continue
+                position = len(ordered_ids)
+                ordered_ids.append(recipe_id)
+                positions[recipe_id] = position
+            if old:
+                self.set_bit(size_bitmaps, len(old), position, False)
+            if new:
+                self.set_bit(size_bitmaps, len(new), position, True)
+            for ingredient_id in set(old) - set(new):
+                self.set_bit(bitmaps, ingredient_id, position, False)
+            for ingredient_id in set(new) - set(old):
+                self.set_bit(bitmaps, ingredient_id, position, True)
+            if new:
+                recipes[recipe_id] = new
+            else:
+                recipes.pop(recipe_id, None)
+        self.snapshot = PantrySnapshot(
+            recipes, tuple(ordered_ids), positions, bitmaps, size_bitmaps
+        )
+
+    def reload(self):
+        self.applied = get_last_change()
+        self.gaps = {}
+        self.load(RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        ).order_by().iterator())
+
+    def sync(self, last):
+        if (self.applied is None
+                or last - self.applied > settings.PANTRY_MAX_DELTA):
+            return self.reload()
+        now = time.monotonic()
+        gaps = {
+            number: deadline for number, deadline in self.gaps.items()
+            if deadline > now
+        }
+        if last <= self.applied and not gaps:
+            self.gaps = gaps
+            return
+        changes = list(PantryChange.objects.filter(
+            Q(id__gt=self.applied) | Q(id__in=gaps)
+        ).order_by('id').values_list('id', 'recipe_id'))
+        seen = {number for number, _ in changes}
+        applied = max(seen | {self.applied})
+        deadline = now + settings.PANTRY_GAP_TIMEOUT
+        gaps.update(
+            (number, deadline)
+            for number in range(self.applied + 1, applied)
+        )
+        if changes:
+            self.apply({recipe_id for _, recipe_id in changes})
+        self.gaps = {
+            number: deadline for number, deadline in gaps.items()
+            if number not in seen
+            and number > applied - settings.PANTRY_MAX_DELTA
+        }
+        self.applied = applied
+
+    def refresh(self):
+        last = get_last_change()
+        if last == self.applied and not self.gaps:
+            return
+        with self.lock:
+            self.sync(last)
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+
+    def count(self, snapshot, ingredient_ids):
+        counter = []
+        for ingredient_id in set(ingredient_ids):
+            carry = snapshot.bitmaps.get(ingredient_id, 0)
+            for index, bits in enumerate(counter):
+                if not carry:
+                    break
+                counter[index], carry = bits ^ carry, bits & carry
+            if carry:
+                counter.append(carry)
+        return counter
+
+    def equal(self, counter, bitmap, value):
+        if value >> len(counter):
+            return 0
+        for index, bits in enumerate(counter):
+            bitmap &= bits if value >> index & 1 else ~bits
+            if not bitmap:
+                break
+        return bitmap
+
+    def rank(self, ingredient_ids, max_missing=0, limit=None):
+        snapshot = self.snapshot
+        counter = self.count(snapshot, ingredient_ids)
+        ranked = []
+        for missing in range(max_missing + 1):
+            for size, bitmap in sorted(
+                snapshot.size_bitmaps.items(), reverse=True
+            ):
+                matched = size - missing
+                if matched <= 0:
+                    continue
+                found = self.equal(counter, bitmap, matched)
+                while found:
+                    if limit is not None and len(ranked) >= limit:
+                        return ranked
+                    position = found.bit_length() - 1
+                    found ^= 1 << position
+                    ranked.append(
+                        (snapshot.recipe_ids[position], matched, missing)
+                    )
+        return ranked
+
+    def search(self, ingredient_ids, max_missing=0, limit=None):
+        self.refresh()
+        return self.rank(ingredient_ids, max_missing, limit)
+
+
+pantry_index = PantryIndex()
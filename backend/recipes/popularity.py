@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from foodgram.versions import bump_versions
+from recipes.models import Cart, Favorite, RecipePopularity
+
+
+def get_decay(seconds):
+    return 0.5 ** (max(seconds, 0) / settings.POPULARITY_HALF_LIFE)
+
+
+def get_weights():
+    return (
+        (Favorite, settings.POPULARITY_FAVORITE_WEIGHT),
+        (Cart, settings.POPULARITY_CART_WEIGHT),
+    )
+
+
+def collect_scores(now, since=None):
+    scores = defaultdict(float)
+    for model, weight in get_weights():
+        events = model.objects.filter(created__lte=now)
+        if since is not None:
+            events = events.filter(created__gt=since)
+        for recipe_id, created in events.values_list(
+            'recipe_id', 'created'
+        ).order_by().iterator(chunk_size=settings.POPULARITY_BATCH_SIZE):
+            scores[recipe_id] += weight * get_decay(
+                (now - created).total_seconds()
+            )
+    return scores
+
+
+def get_checkpoint():
+    return RecipePopularity.objects.aggregate(
+        updated=Max('updated')
+    )['updated']
+
+
+def apply_scores(scores, now):
+    existing = RecipePopularity.objects.in_bulk(list(scores))
+    created = []
+    for recipe_id, score in scores.items():
+        if recipe_id in existing:
+            existing[recipe_id].score += score
+        else:
+            created.append(RecipePopularity(
+                recipe_id=recipe_id, score=score, rank=0, updated=now
+            ))
+    RecipePopularity.objects.bulk_update(
+        existing.values(), ('score', ),
+        batch_size=settings.POPULARITY_BATCH_SIZE
+    )
+    RecipePopularity.objects.bulk_create(
+        created, batch_size=settings.POPULARITY_BATCH_SIZE
+    )
+    return len(created)
+
+
+def update_ranks():
+    changed = []
+    rows = RecipePopularity.objects.select_for_update().order_by(
+        '-score', '-recipe_id'
+    ).values_list('recipe_id', 'rank')
+    for rank, (recipe_id, old_rank) in enumerate(rows.iterator(), 1):
+        if rank != old_rank:
+            changed.append(RecipePopularity(recipe_id=recipe_id, rank=rank))
+    RecipePopularity.objects.bulk_update(
+        changed, ('rank', ), batch_size=settings.POPULARITY_BATCH_SIZE
+    )
+    return len(changed)
+
+
+def close_rank_gap(recipe_id):
+    rank = RecipePopularity.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('rank', flat=True).first()
+    if rank is None:
+        return
+    RecipePopularity.objects.filter(rank__gt=rank).update(rank=F('rank') - 1)
+    bump_versions(RecipePopularity)
+
+
+@atomic
+def refresh_popularity(full=False):
+    now = timezone.now() - timedelta(
+        seconds=settings.POPULARITY_COMMIT_LAG
+    )
+    since = None if full else get_checkpoint()
+    if since is None:
+        RecipePopularity.objects.all().delete()
+    else:
+        RecipePopularity.objects.update(
+            score=F('score') * get_decay((now - since).total_seconds()),
+            updated=now
+        )
+    scores = collect_scores(now, since)
+    added = apply_scores(scores, now)
+    removed, _ = RecipePopularity.objects.filter(
+        score__lt=settings.POPULARITY_MIN_SCORE
+    ).delete()
+    moved = update_ranks()
+    bump_versions(RecipePopularity)
+    return {
+        'full': since is None,
+        'scored': len(scores),
+        'added': added,
+        'removed': removed,
+        'moved': moved,
+    }
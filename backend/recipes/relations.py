@@ -0,0 +1,75 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from foodgram.versions import bump_versions
+from recipes import shopping_list
+from recipes.counters import change_counters
+from recipes.models import Cart
+
+pending_changes = ContextVar('pending_changes', default=None)
+
+
+def apply_changes(model, user_id, recipe_ids, delta):
+    if not recipe_ids:
+        return
+    change_counters(model, recipe_ids, delta)
+    if model is Cart:
+        if delta > 0:
+            shopping_list.add_recipes(user_id, recipe_ids)
+        else:
+            shopping_list.remove_recipes(user_id, recipe_ids)
+    bump_versions(model)
+
+
+def relations_changed(model, user_id, recipe_ids, delta):
+    changes = pending_changes.get()
+    if changes is None:
+        return apply_changes(model, user_id, list(recipe_ids), delta)
+    changes[model, user_id, delta].extend(recipe_ids)
+
+
+@contextmanager
+def collect_changes():
+    changes = defaultdict(list)
+    token = pending_changes.set(changes)
+    try:
+        yield
+    finally:
+        pending_changes.reset(token)
+    for (model, user_id, delta), recipe_ids in changes.items():
+        apply_changes(model, user_id, recipe_ids, delta)
+
+
+def lock_relations(model, user_id, recipe_ids):
+    shopping_list.lock_users((user_id, ))
+    return model.objects.filter(user_id=user_id, recipe_id__in=recipe_ids)
+
+
+@transaction.atomic
+def add_relations(model, user_id, recipe_ids):
+    recipe_ids = list(recipe_ids)
+    existing = set(lock_relations(model, user_id, recipe_ids).values_list(
+        'recipe_id', flat=True
+    ))
+    added = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in existing
+    ]
+    model.objects.bulk_create(
+        (model(user_id=user_id, recipe_id=recipe_id) for recipe_id in added),
+        ignore_conflicts=True
+    )
+    relations_changed(model, user_id, added, 1)
+    return added
+
+
+@transaction.atomic
+def remove_relations(model, user_id, recipe_ids):
+    relations = lock_relations(model, user_id, list(recipe_ids))
+    removed = list(relations.values_list('recipe_id', flat=True))
+    if removed:
+        with collect_changes():
+            relations.delete()
+    return removed
@@ -0,0 +1,91 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import (Case, CharField, F, Func, IntegerField, Q,
+                              Value, When)
+
+from recipes.models import Recipe
+
+CASEFOLD_FUNCTION = 'foodgram_casefold'
+
+
+def get_search_vector():
+    return (
+        SearchVector(
+            'name', weight='A', config=settings.SEARCH_CONFIG
+        )
+        + SearchVector(
+            'text', weight='B', config=settings.SEARCH_CONFIG
+        )
+    )
+
+
+def is_postgresql(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def update_search_vector(recipe_ids, using='default'):
+    if is_postgresql(using):
+        Recipe.objects.using(using).filter(id__in=recipe_ids).update(
+            search_vector=get_search_vector()
+        )
+
+
+def casefold(value):
+    return None if value is None else value.casefold()
+
+
+def register_functions(connection):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            CASEFOLD_FUNCTION, 1, casefold, deterministic=True
+        )
+
+
+def get_tokens(value):
+    return re.findall(
+        r'\w+', value.casefold()
+    )[:settings.SEARCH_MAX_TOKENS]
+
+
+def fold_search_fields(queryset):
+    if connections[queryset.db].vendor != 'sqlite':
+        return queryset, 'name__icontains', 'text__icontains'
+    return queryset.annotate(**{
+        f'folded_{field}': Func(
+            F(field), function=CASEFOLD_FUNCTION, output_field=CharField()
+        )
+        for field in ('name', 'text')
+    }), 'folded_name__contains', 'folded_text__contains'
+
+
+def search_recipes(queryset, value):
+    if is_postgresql(queryset.db):
+        query = SearchQuery(
+            value, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-pub_date', '-id')
+    tokens = get_tokens(value)
+    if not tokens:
+        return queryset.none()
+    queryset, name_lookup, text_lookup = fold_search_fields(queryset)
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(**{name_lookup: token}) | Q(**{text_lookup: token})
+        )
+    rank = Value(0)
+    for token in tokens:
+        rank = rank + Case(
+            When(**{name_lookup: token}, then=Value(2)),
+            When(**{text_lookup: token}, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    return queryset.annotate(search_rank=rank).order_by(
+        '-search_rank', '-pub_date', '-id'
+    )
@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from recipes.models import Cart, RecipeIngredient, ShoppingListItem
+from users.models import User
+
+pending_deltas = ContextVar('pending_deltas', default=None)
+
+
+def get_recipe_amounts(recipe_ids):
+    return Counter(dict(RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient_id').annotate(
+        total=Sum('amount')
+    ).values_list('ingredient_id', 'total').order_by()))
+
+
+def lock_users(user_ids):
+    list(User.objects.select_for_update().filter(
+        id__in=user_ids
+    ).order_by('id').values_list('id', flat=True))
+
+
+@transaction.atomic
+def apply_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not deltas:
+        return
+    lock_users(user_ids)
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas
+    )
+    items.update(amount=F('amount') + Case(
+        *(When(ingredient_id=ingredient_id, then=Value(delta))
+          for ingredient_id, delta in deltas.items()),
+        default=Value(0)
+    ))
+    existing = set(items.values_list('user_id', 'ingredient_id'))
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=user_id,
+            ingredient_id=ingredient_id,
+            amount=delta
+        )
+        for user_id in set(user_ids)
+        for ingredient_id, delta in deltas.items()
+        if delta > 0 and (user_id, ingredient_id) not in existing
+    )
+    items.filter(amount__lte=0).delete()
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_deltas((user_id, ), get_recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_deltas((user_id, ), {
+        ingredient_id: -amount
+        for ingredient_id, amount in get_recipe_amounts(recipe_ids).items()
+    })
+
+
+def apply_recipe_deltas(recipe_id, deltas):
+    user_ids = list(Cart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+    if user_ids:
+        apply_deltas(user_ids, deltas)
+
+
+def recipe_changed(recipe_id, deltas):
+    changes = pending_deltas.get()
+    if changes is None:
+        return apply_recipe_deltas(recipe_id, deltas)
+    changes[recipe_id].update(deltas)
+
+
+@contextmanager
+def collect_changes():
+    changes = defaultdict(Counter)
+    token = pending_deltas.set(changes)
+    try:
+        yield
+    finally:
+        pending_deltas.reset(token)
+    for recipe_id, deltas in changes.items():
+        apply_recipe_deltas(recipe_id, deltas)
+
+
+def compute_all():
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in RecipeIngredient.objects.filter(
+            recipe__shopping_carts__isnull=False
+        ).values(
+            'recipe__shopping_carts__user_id', 'ingredient_id'
+        ).annotate(
+            total=Sum('amount')
+        ).values_list(
+            'recipe__shopping_carts__user_id', 'ingredient_id', 'total'
+        ).order_by()
+    }
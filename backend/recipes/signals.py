@@ -0,0 +1,167 @@
+from collections import Counter
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens, invalidate_user_tokens
+from foodgram.versions import bump_versions
+from recipes import feed
+from recipes.counters import change_counters
+from recipes.models import (Cart, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.pantry_index import record_changes
+from recipes.popularity import close_rank_gap
+from recipes.relations import relations_changed
+from recipes.search import register_functions, update_search_vector
+from recipes.shopping_list import recipe_changed
+from users.models import Subscribe, User
+
+SEARCH_FIELDS = {'name', 'text'}
+AUTH_FIELDS = ('is_active', 'password', 'is_staff', 'is_superuser')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_version(**kwargs):
+    bump_versions(Recipe)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredient_version(**kwargs):
+    bump_versions(Ingredient)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tag_version(**kwargs):
+    bump_versions(Tag)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def save_relation(sender, instance, created, **kwargs):
+    if created:
+        relations_changed(sender, instance.user_id, (instance.recipe_id, ), 1)
+    else:
+        bump_versions(sender)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def delete_relation(sender, instance, **kwargs):
+    relations_changed(sender, instance.user_id, (instance.recipe_id, ), -1)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def load_ingredient_amount(instance, **kwargs):
+    instance._old_amount = None
+    if instance.pk is not None:
+        instance._old_amount = RecipeIngredient.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def save_ingredient_amount(instance, **kwargs):
+    deltas = Counter({instance.ingredient_id: instance.amount})
+    if getattr(instance, '_old_amount', None) is not None:
+        ingredient_id, amount = instance._old_amount
+        deltas[ingredient_id] -= amount
+    recipe_changed(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def delete_ingredient_amount(instance, **kwargs):
+    recipe_changed(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_rank(instance, **kwargs):
+    close_rank_gap(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def record_recipe_delete(instance, **kwargs):
+    record_changes((instance.id, ))
+
+
+@receiver(connection_created)
+def register_search_functions(connection, **kwargs):
+    register_functions(connection)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_search_vector(instance, using, update_fields, **kwargs):
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        update_search_vector((instance.id, ), using)
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(instance, created, **kwargs):
+    if created:
+        change_counters(Recipe, (instance.author_id, ), 1)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_created_recipe(instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(instance, **kwargs):
+    change_counters(Recipe, (instance.author_id, ), -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def count_created_subscription(instance, created, **kwargs):
+    if created:
+        change_counters(Subscribe, (instance.author_id, ), 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def count_deleted_subscription(instance, **kwargs):
+    change_counters(Subscribe, (instance.author_id, ), -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def follow_author_feed(instance, created, **kwargs):
+    if created:
+        feed.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def unfollow_author_feed(instance, **kwargs):
+    feed.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=User)
+def load_auth_state(instance, update_fields, **kwargs):
+    instance._auth_state = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(AUTH_FIELDS)
+    ):
+        return
+    instance._auth_state = User.objects.filter(pk=instance.pk).values_list(
+        *AUTH_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_tokens(instance, **kwargs):
+    state = getattr(instance, '_auth_state', None)
+    if state is not None and state != tuple(
+        getattr(instance, field) for field in AUTH_FIELDS
+    ):
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_removed_token(instance, **kwargs):
+    invalidate_tokens((instance.key, ))
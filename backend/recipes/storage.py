@@ -0,0 +1,64 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def get_content_hash(content):
+    digest = getattr(content, 'content_hash', None)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        digest = content.content_hash = sha256.hexdigest()
+    return digest
+
+
+def touch(storage, name):
+    try:
+        os.utime(storage.path(name))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = get_content_hash(content)
+        return os.path.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if touch(self, name):
+            return name
+        return super().save(name, content, max_length)
+
+    def walk(self, directory=''):
+        if not self.exists(directory):
+            return
+        directories, files = self.listdir(directory)
+        for filename in files:
+            yield os.path.join(directory, filename)
+        for subdirectory in directories:
+            yield from self.walk(os.path.join(directory, subdirectory))
+
+
+def is_stored(field_file, content):
+    if not field_file or content is None:
+        return False
+    name = field_file.field.generate_filename(
+        field_file.instance, content.name
+    )
+    return field_file.name == field_file.storage.get_content_name(
+        name, content
+    )
@@ -0,0 +1,60 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from foodgram.tests.utils import TEST_CACHES, create_recipe, create_user
+from recipes.management.commands.cleanup_media import Command
+from recipes.models import Recipe
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CleanupMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Recipe._meta.get_field('image').storage
+        self.author = create_user('author')
+
+    def save(self, content):
+        return self.storage.save(
+            'recipes/images/upload.png', ContentFile(content)
+        )
+
+    def age(self, name):
+        old = time.time() - 2 * 3600
+        os.utime(self.storage.path(name), (old, old))
+
+    def cleanup(self):
+        call_command('cleanup_media', stdout=io.StringIO())
+
+    def test_removes_old_unreferenced_files(self):
+        name = self.save(b'orphan')
+        self.age(name)
+        self.cleanup()
+        self.assertFalse(self.storage.exists(name))
+
+    def test_dedup_hit_refreshes_file_age(self):
+        name = self.save(b'image')
+        self.age(name)
+        self.assertEqual(self.save(b'image'), name)
+        self.cleanup()
+        self.assertTrue(self.storage.exists(name))
+
+    def test_rechecks_references_before_delete(self):
+        name = self.save(b'image')
+        self.age(name)
+        create_recipe(self.author, 'Рецепт', image=name)
+        with mock.patch.object(Command, 'get_references', Counter):
+            self.cleanup()
+        self.assertTrue(self.storage.exists(name))
@@ -0,0 +1,84 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Recipe
+from users.models import Subscribe, User
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author, 'Блины')
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recipe_counts(self):
+        return Recipe.objects.values_list(
+            'favorites_count', 'in_carts_count'
+        ).get(id=self.recipe.id)
+
+    def author_counts(self):
+        return User.objects.values_list(
+            'recipes_count', 'followers_count'
+        ).get(id=self.author.id)
+
+    def request(self, method, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url)
+
+    def reconcile(self, **options):
+        stdout = io.StringIO()
+        call_command('reconcile_counters', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_relations_change_recipe_counters(self):
+        for suffix in ('favorite', 'shopping_cart'):
+            self.assertEqual(self.request(
+                'post', f'/api/recipes/{self.recipe.id}/{suffix}/'
+            ).status_code, 201)
+        self.assertEqual(self.recipe_counts(), (1, 1))
+        self.request('delete', f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(self.recipe_counts(), (0, 1))
+        self.assertEqual(
+            self.client.get(f'/api/recipes/{self.recipe.id}/').status_code,
+            200
+        )
+
+    def test_subscriptions_and_recipes_change_author_counters(self):
+        self.assertEqual(self.author_counts(), (1, 0))
+        self.request('post', f'/api/users/{self.author.id}/subscribe/')
+        create_recipe(self.author, 'Хлеб')
+        self.assertEqual(self.author_counts(), (2, 1))
+        Subscribe.objects.filter(user=self.user).delete()
+        self.recipe.delete()
+        self.assertEqual(self.author_counts(), (1, 0))
+
+    def test_counters_do_not_go_negative(self):
+        Recipe.objects.filter(id=self.recipe.id).update(favorites_count=0)
+        self.request('post', f'/api/recipes/{self.recipe.id}/favorite/')
+        Recipe.objects.filter(id=self.recipe.id).update(favorites_count=0)
+        self.request('delete', f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(self.recipe_counts(), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        self.assertIn('Счётчики согласованы', self.reconcile(verify=True))
+        Recipe.objects.filter(id=self.recipe.id).update(favorites_count=5)
+        User.objects.filter(id=self.author.id).update(recipes_count=0)
+        with self.assertRaises(CommandError):
+            self.reconcile(verify=True)
+        self.assertEqual(self.recipe_counts(), (5, 0))
+        self.assertIn('Счётчики исправлены: 2', self.reconcile())
+        self.assertEqual(self.recipe_counts(), (0, 0))
+        self.assertEqual(self.author_counts(), (1, 0))
@@ -0,0 +1,109 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe, User
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    FEED_FANOUT_MAX_FOLLOWERS=2,
+    FEED_FANOUT_MIN_FOLLOWERS=1
+)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.followers = [create_user(f'follower{number}') for number in (1, 2)]
+        cls.small, cls.popular, cls.stranger = (
+            create_user(name) for name in ('small', 'popular', 'stranger')
+        )
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def follow(self, user, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscribe.objects.create(user=user, author=author)
+
+    def publish(self, author, name, minutes):
+        recipe = create_recipe(author, name)
+        Recipe.objects.filter(id=recipe.id).update(
+            pub_date=timezone.now() - timedelta(minutes=minutes)
+        )
+        FeedEntry.objects.filter(recipe=recipe).update(
+            pub_date=timezone.now() - timedelta(minutes=minutes)
+        )
+        return recipe.id
+
+    def feed(self, limit=2):
+        ids = []
+        url = f'/api/recipes/feed/?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def fanout(self, author):
+        return User.objects.get(id=author.id).feed_fanout
+
+    def test_merges_fanned_out_and_pulled_authors(self):
+        self.follow(self.user, self.small)
+        self.follow(self.user, self.popular)
+        for follower in self.followers:
+            self.follow(follower, self.popular)
+        self.assertTrue(self.fanout(self.small))
+        self.assertFalse(self.fanout(self.popular))
+        expected = [
+            self.publish(author, f'{author.username} {minutes}', minutes)
+            for minutes, author in enumerate(
+                (self.popular, self.small, self.small, self.popular)
+            )
+        ]
+        self.publish(self.stranger, 'Чужой', 0)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(self.feed(), expected)
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        recipe_id = self.publish(self.small, 'Ранний', 5)
+        self.follow(self.user, self.small)
+        self.assertEqual(self.feed(), [recipe_id])
+        Subscribe.objects.filter(user=self.user).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_backfill_command_restores_fanout(self):
+        recipe_id = self.publish(self.popular, 'Рецепт', 1)
+        for user in (self.user, *self.followers):
+            self.follow(user, self.popular)
+        self.assertFalse(self.fanout(self.popular))
+        Subscribe.objects.filter(user__in=self.followers).delete()
+        stdout = io.StringIO()
+        call_command('backfill_feeds', stdout=stdout)
+        self.assertIn('переведено на рассылку: 1', stdout.getvalue())
+        self.assertTrue(self.fanout(self.popular))
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            [recipe_id]
+        )
+        self.assertEqual(self.feed(), [recipe_id])
+
+    def test_requires_authentication(self):
+        self.assertEqual(
+            APIClient().get('/api/recipes/feed/').status_code, 401
+        )
@@ -0,0 +1,57 @@
+import io
+import shutil
+import tempfile
+import threading
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.images import submit_recipe_image
+from recipes.models import Recipe
+
+
+def save_image(name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), 'red').save(buffer, 'PNG')
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeImageTests(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.recipe = create_recipe(create_user('author'), 'Рецепт')
+
+    def get_variants(self):
+        return Recipe.objects.get(id=self.recipe.id).image_variants
+
+    def test_worker_builds_variants(self):
+        save_image(self.recipe.image.name)
+        self.assertTrue(submit_recipe_image(self.recipe.id).result())
+        variants = self.get_variants()
+        self.assertEqual(set(variants), {'thumb', 'card', 'full'})
+        with default_storage.open(variants['thumb']['jpeg']) as thumb:
+            self.assertEqual(Image.open(thumb).size, (160, 120))
+
+    def test_failure_is_logged_and_retried_by_command(self):
+        with self.assertLogs('recipes.images', 'ERROR') as logs:
+            future = submit_recipe_image(self.recipe.id)
+            reported = threading.Event()
+            future.add_done_callback(lambda future: reported.set())
+            self.assertTrue(reported.wait(10))
+        self.assertIsInstance(future.exception(), OSError)
+        self.assertIn(str(self.recipe.id), logs.output[0])
+        self.assertEqual(self.get_variants(), {})
+        save_image(self.recipe.image.name)
+        call_command('process_images', stdout=io.StringIO())
+        self.assertEqual(set(self.get_variants()), {'thumb', 'card', 'full'})
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from foodgram.tests.utils import TEST_CACHES
+from recipes.importers import IMPORT_FIELDS, import_batch, iter_batches
+from recipes.models import Ingredient, Tag
+
+INGREDIENTS = [
+    {'name': 'Мука', 'measurement_unit': 'г'},
+    {'name': 'Соус "острый",\nдомашний', 'measurement_unit': 'мл'},
+    {'name': 'Соль', 'measurement_unit': 'г'},
+]
+TAGS = [
+    {'name': 'Завтрак', 'slug': 'breakfast', 'color': '#E26C2D'},
+    {'name': 'Обед', 'slug': 'lunch', 'color': '#49B64E'},
+]
+
+
+def write_rows(path, rows, fields, file_format):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if file_format == 'json':
+            json.dump(rows, file, ensure_ascii=False)
+        elif file_format == 'jsonl':
+            file.writelines(
+                json.dumps(row, ensure_ascii=False) + '\n' for row in rows
+            )
+        else:
+            file.write(''.join(
+                ','.join(
+                    '"{}"'.format(row[field].replace('"', '""'))
+                    for field in fields
+                ) + '\r\n'
+                for row in rows
+            ))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImporterTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, rows, model=Ingredient, file_format=None):
+        path = os.path.join(self.directory, name)
+        write_rows(
+            path, rows, IMPORT_FIELDS[model],
+            file_format or os.path.splitext(name)[1][1:]
+        )
+        return path
+
+    def read(self, path, **kwargs):
+        return [
+            row
+            for batch in iter_batches(
+                path, IMPORT_FIELDS[Ingredient], **kwargs
+            )
+            for row in batch
+        ]
+
+    def test_formats_by_extension(self):
+        for name in ('rows.json', 'rows.jsonl', 'rows.csv'):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.read(self.write(name, INGREDIENTS), batch_size=1),
+                    INGREDIENTS
+                )
+
+    def test_csv_batches_keep_quoted_line_breaks(self):
+        path = self.write('rows.csv', INGREDIENTS * 3)
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                self.assertEqual(
+                    self.read(path, batch_size=2, workers=workers),
+                    INGREDIENTS * 3
+                )
+
+    def test_command_formats_per_file(self):
+        ingredients = self.write('ingredients.txt', INGREDIENTS,
+                                 file_format='csv')
+        tags = self.write('tags.txt', TAGS, Tag, file_format='json')
+        call_command(
+            'import_json', ingredients=ingredients, tags=tags,
+            ingredients_format='csv', tags_format='json',
+            stdout=io.StringIO()
+        )
+        self.assertEqual(Ingredient.objects.count(), len(INGREDIENTS))
+        self.assertEqual(
+            set(Tag.objects.values_list('slug', flat=True)),
+            {'breakfast', 'lunch'}
+        )
+
+    def test_created_count_excludes_conflicts(self):
+        Tag.objects.create(name='Завтрак', slug='morning', color='#000000')
+        self.assertEqual(import_batch(Tag, TAGS), (1, 0))
+        self.assertFalse(Tag.objects.filter(slug='breakfast').exists())
+        self.assertEqual(import_batch(Tag, TAGS), (0, 0))
+
+    def test_update_changes_existing_rows(self):
+        import_batch(Tag, TAGS)
+        changed = [{**TAGS[0], 'color': '#FFFFFF'}, TAGS[1]]
+        self.assertEqual(import_batch(Tag, changed, update=True), (0, 1))
+        self.assertEqual(
+            Tag.objects.get(slug='breakfast').color, '#FFFFFF'
+        )
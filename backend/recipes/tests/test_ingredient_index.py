@@ -0,0 +1,58 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import TEST_CACHES, clear_caches
+from recipes.ingredient_index import IngredientIndex, ingredient_index
+from recipes.models import Ingredient
+
+NAMES = ('Мука пшеничная', 'мускатный орех', 'Молоко', 'Рисовая мука', 'Мак')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IngredientIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in NAMES:
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        clear_caches()
+        ingredient_index.version = None
+        self.index = IngredientIndex()
+
+    def names(self, *args, **kwargs):
+        return [row['name'] for row in self.index.search(*args, **kwargs)]
+
+    def test_prefix_is_case_insensitive_and_sorted(self):
+        self.assertEqual(
+            self.names('МУ'), ['Мука пшеничная', 'мускатный орех']
+        )
+
+    def test_limit(self):
+        self.assertEqual(self.names('м', limit=2), ['Мак', 'Молоко'])
+
+    def test_contains_appends_inner_matches(self):
+        self.assertEqual(
+            self.names('мука', contains=True),
+            ['Мука пшеничная', 'Рисовая мука']
+        )
+        self.assertEqual(self.names('мука', limit=1, contains=True),
+                         ['Мука пшеничная'])
+
+    def test_reloads_after_version_bump(self):
+        self.assertEqual(self.names('Соль'), [])
+        with self.assertNumQueries(1):
+            self.index.search('Мо')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='Соль', measurement_unit='г')
+        self.assertEqual(self.names('Соль'), ['Соль'])
+
+    def test_endpoint_uses_index(self):
+        response = APIClient().get('/api/ingredients/?name=мо')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['name'] for item in response.data], ['Молоко']
+        )
+        self.assertEqual(
+            set(response.data[0]), {'id', 'name', 'measurement_unit'}
+        )
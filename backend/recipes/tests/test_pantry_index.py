@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from foodgram.tests.utils import create_recipe, create_user
+from recipes.models import Ingredient, PantryChange, RecipeIngredient
+from recipes.pantry_index import PantryIndex
+
+
+class PantryIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = [
+            create_recipe(author, f'Рецепт {number}') for number in range(3)
+        ]
+        for recipe, ingredients in zip(cls.recipes, (
+            cls.ingredients[:1], cls.ingredients[:2], cls.ingredients[1:]
+        )):
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=1)
+                for ingredient in ingredients
+            )
+
+    def setUp(self):
+        PantryChange.objects.all().delete()
+        self.index = PantryIndex()
+        self.index.refresh()
+
+    def ids(self, *numbers):
+        return [self.ingredients[number].id for number in numbers]
+
+    def found(self, *numbers, max_missing=0):
+        return sorted(
+            (recipe_id, missing) for recipe_id, _, missing
+            in self.index.search(self.ids(*numbers), max_missing)
+        )
+
+    def change(self, number, recipe, *ingredients):
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        PantryChange.objects.create(id=number, recipe_id=recipe.id)
+
+    def test_rank_by_missing_ingredients(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        self.assertEqual(self.found(0, 1), [(first, 0), (second, 0)])
+        self.assertEqual(
+            self.found(0, 1, max_missing=1), [(first, 0), (second, 0)]
+        )
+        self.assertEqual(
+            self.found(0, 1, max_missing=2),
+            [(first, 0), (second, 0), (third, 2)]
+        )
+        self.assertEqual(self.found(3), [])
+
+    def test_apply_publishes_new_snapshot(self):
+        snapshot = self.index.snapshot
+        recipe_ids = snapshot.recipe_ids
+        bitmaps = dict(snapshot.bitmaps)
+        size_bitmaps = dict(snapshot.size_bitmaps)
+        recipe = create_recipe(self.recipes[0].author, 'Новый')
+        self.change(1, recipe, self.ingredients[3])
+        self.change(2, self.recipes[0], self.ingredients[3])
+        self.index.refresh()
+        self.assertIsNot(self.index.snapshot, snapshot)
+        self.assertEqual(snapshot.recipe_ids, recipe_ids)
+        self.assertEqual(snapshot.bitmaps, bitmaps)
+        self.assertEqual(snapshot.size_bitmaps, size_bitmaps)
+        self.assertEqual(
+            self.found(3), [(self.recipes[0].id, 0), (recipe.id, 0)]
+        )
+
+    def test_late_change_in_gap_is_applied_without_reload(self):
+        self.change(2, self.recipes[0], self.ingredients[3])
+        self.index.refresh()
+        self.assertEqual(self.index.applied, 2)
+        self.assertIn(1, self.index.gaps)
+        with mock.patch.object(self.index, 'reload') as reload:
+            self.change(1, self.recipes[1], self.ingredients[3])
+            self.index.refresh()
+        reload.assert_not_called()
+        self.assertEqual(self.index.gaps, {})
+        self.assertEqual(
+            self.found(3),
+            [(self.recipes[0].id, 0), (self.recipes[1].id, 0)]
+        )
+
+    @override_settings(PANTRY_GAP_TIMEOUT=0)
+    def test_expired_gap_is_dropped(self):
+        self.change(3, self.recipes[0], self.ingredients[3])
+        self.index.refresh()
+        with self.assertNumQueries(1):
+            self.index.refresh()
+        self.assertEqual(self.index.gaps, {})
+
+    @override_settings(PANTRY_MAX_DELTA=2)
+    def test_large_delta_reloads(self):
+        self.change(5, self.recipes[0], self.ingredients[3])
+        with mock.patch.object(
+            self.index, 'reload', wraps=self.index.reload
+        ) as reload:
+            self.index.refresh()
+        reload.assert_called_once()
+        self.assertEqual(self.found(3), [(self.recipes[0].id, 0)])
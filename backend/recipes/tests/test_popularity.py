@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import Favorite, RecipePopularity
+from recipes.popularity import refresh_popularity
+
+
+@override_settings(CACHES=TEST_CACHES, POPULARITY_COMMIT_LAG=60, PAGE_SIZE=2)
+class PopularityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.users = [create_user(f'user{number}') for number in range(5)]
+        cls.recipes = [
+            create_recipe(author, f'Рецепт {number}') for number in range(5)
+        ]
+        for number, recipe in enumerate(cls.recipes):
+            for user in cls.users[:5 - number]:
+                Favorite.objects.create(user=user, recipe=recipe)
+        Favorite.objects.update(
+            created=timezone.now() - timedelta(minutes=10)
+        )
+
+    def setUp(self):
+        clear_caches()
+
+    def get_ranks(self):
+        return list(RecipePopularity.objects.order_by('rank').values_list(
+            'recipe_id', 'rank'
+        ))
+
+    def get_popular(self, page):
+        response = APIClient().get(
+            '/api/recipes/popular/', {'page': page, 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_ranks_follow_scores(self):
+        refresh_popularity(full=True)
+        self.assertEqual(self.get_ranks(), [
+            (recipe.id, rank) for rank, recipe in enumerate(self.recipes, 1)
+        ])
+
+    def test_recipe_delete_keeps_ranks_dense(self):
+        refresh_popularity(full=True)
+        self.recipes[1].delete()
+        remaining = [self.recipes[0], *self.recipes[2:]]
+        self.assertEqual(self.get_ranks(), [
+            (recipe.id, rank) for rank, recipe in enumerate(remaining, 1)
+        ])
+        self.assertEqual(self.get_popular(1), [
+            recipe.id for recipe in remaining[:2]
+        ])
+        self.assertEqual(self.get_popular(2), [
+            recipe.id for recipe in remaining[2:]
+        ])
+
+    def test_late_commit_is_counted_by_next_refresh(self):
+        refresh_popularity(full=True)
+        recipe = self.recipes[-1]
+        late = Favorite.objects.create(user=self.users[-1], recipe=recipe)
+        Favorite.objects.filter(id=late.id).update(
+            created=timezone.now() - timedelta(seconds=30)
+        )
+        score = RecipePopularity.objects.get(recipe=recipe).score
+        with mock.patch(
+            'recipes.popularity.timezone.now',
+            return_value=timezone.now() + timedelta(minutes=2)
+        ):
+            result = refresh_popularity()
+        self.assertFalse(result['full'])
+        self.assertEqual(result['scored'], 1)
+        self.assertGreater(
+            RecipePopularity.objects.get(recipe=recipe).score, score * 1.5
+        )
+
+    def test_recent_additions_wait_for_commit_lag(self):
+        refresh_popularity(full=True)
+        Favorite.objects.create(user=self.users[-1], recipe=self.recipes[-1])
+        self.assertEqual(refresh_popularity()['scored'], 0)
@@ -0,0 +1,151 @@
+import io
+import threading
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.tests.utils import (TEST_CACHES, clear_caches, create_recipe,
+                                  create_user)
+from recipes.models import (Cart, Ingredient, RecipeIngredient,
+                            ShoppingListItem, Tag)
+from recipes.shopping_list import apply_deltas
+
+
+def get_shopping_list(user):
+    return dict(ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'amount'
+    ))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ShoppingListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.users = [create_user(f'user{number}') for number in range(2)]
+        cls.flour, cls.milk, cls.salt = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Мука', 'Молоко', 'Соль')
+        )
+        cls.tag = Tag.objects.create(name='Тег', slug='tag', color='#000000')
+        cls.recipe = create_recipe(cls.author, 'Блины')
+        cls.recipe.tags.set((cls.tag, ))
+        cls.flour_item = RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredient=cls.flour, amount=200
+        )
+        cls.milk_item = RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredient=cls.milk, amount=500
+        )
+        other = create_recipe(cls.author, 'Хлеб')
+        RecipeIngredient.objects.create(
+            recipe=other, ingredient=cls.flour, amount=300
+        )
+        for user in cls.users:
+            Cart.objects.create(user=user, recipe=cls.recipe)
+        Cart.objects.create(user=cls.users[0], recipe=other)
+
+    def setUp(self):
+        clear_caches()
+
+    def assertConsistent(self):
+        call_command(
+            'rebuild_shopping_lists', verify=True, stdout=io.StringIO()
+        )
+
+    def test_cart_totals(self):
+        self.assertEqual(
+            get_shopping_list(self.users[0]), {'Мука': 500, 'Молоко': 500}
+        )
+        self.assertEqual(
+            get_shopping_list(self.users[1]), {'Мука': 200, 'Молоко': 500}
+        )
+        self.assertConsistent()
+
+    def test_recipe_update_applies_deltas(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                f'/api/recipes/{self.recipe.id}/', {
+                    'name': 'Блины',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'tags': [self.tag.id],
+                    'ingredients': [
+                        {'id': self.flour.id, 'amount': 250},
+                        {'id': self.salt.id, 'amount': 5},
+                    ],
+                }, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            get_shopping_list(self.users[0]), {'Мука': 550, 'Соль': 5}
+        )
+        self.assertEqual(
+            get_shopping_list(self.users[1]), {'Мука': 250, 'Соль': 5}
+        )
+        self.assertConsistent()
+
+    def test_ingredient_saved_directly(self):
+        self.flour_item.amount = 150
+        self.flour_item.save()
+        self.milk_item.ingredient = self.salt
+        self.milk_item.amount = 3
+        self.milk_item.save()
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.milk, amount=100
+        )
+        self.assertEqual(
+            get_shopping_list(self.users[1]),
+            {'Мука': 150, 'Молоко': 100, 'Соль': 3}
+        )
+        self.assertConsistent()
+
+    def test_ingredient_deleted_directly(self):
+        self.milk_item.delete()
+        self.assertEqual(get_shopping_list(self.users[1]), {'Мука': 200})
+        self.assertConsistent()
+
+    def test_recipe_delete_subtracts_once(self):
+        self.recipe.delete()
+        self.assertEqual(get_shopping_list(self.users[0]), {'Мука': 300})
+        self.assertEqual(get_shopping_list(self.users[1]), {})
+        self.assertConsistent()
+
+    def test_ingredient_delete_removes_items(self):
+        self.milk.delete()
+        self.assertEqual(get_shopping_list(self.users[1]), {'Мука': 200})
+        self.assertConsistent()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужны блокировки строк')
+class ConcurrentDeltaTests(TransactionTestCase):
+    def test_concurrent_first_inserts_do_not_conflict(self):
+        user = create_user('user')
+        ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def add():
+            try:
+                barrier.wait()
+                apply_deltas((user.id, ), {ingredient.id: 10})
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=user).amount, 40
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.3 on 2026-10-17 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_feed_fanout(apps, schema_editor):
+    apps.get_model('users', 'User').objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_fanout=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, editable=False, help_text='Новые рецепты автора записываются в ленты подписчиков', verbose_name='Рассылка в ленты'),
+        ),
+        migrations.RunPython(fill_feed_fanout, migrations.RunPython.noop),
+    ]